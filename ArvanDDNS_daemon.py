@@ -0,0 +1,60 @@
+import signal
+import threading
+
+from arvan_ddns import (
+    run_cycle, auto_update, connection_stats, parse_bool, config_relative, AddressWatcher, rate_limit_stats,
+    SamplingProfiler, ConfigWatcher,
+)
+from arvan_ddns.headless import log, start
+
+
+def log_connection_stats(report=None):
+    stats = connection_stats()
+    log(f"Connections: {stats['new']} new, {stats['reused']} reused.\n")
+    waited = sum(kind['wait_seconds'] for account in rate_limit_stats().values() for kind in account.values())
+    if waited:
+        log(f"Rate limiter: {waited:.2f}s spent waiting for tokens.\n")
+
+def enable_profiler_toggle(path):
+    # kill -USR1 <pid> starts sampling; the next USR1 writes collapsed stacks to path
+    profiler = SamplingProfiler()
+
+    def toggle(signum, frame):
+        if profiler.toggle(path):
+            log("Sampling profiler started.\n")
+        else:
+            log(f"Sampling profiler stopped, stacks written to {path}.\n")
+
+    signal.signal(signal.SIGUSR1, toggle)
+
+
+def main():
+    path, settings, records, cache = start()
+    if hasattr(signal, 'SIGUSR1') and settings['profile_file']:
+        enable_profiler_toggle(config_relative(settings['profile_file'], path))
+
+    log(f"Starting headless updater for {len(records)} record(s)\n")
+    # Records without an Interval get a single check; only exit when none has one
+    if not any(record.interval_seconds > 0 for record in records):
+        run_cycle(records, log, cache=cache)
+        return
+
+    stop_event = threading.Event()
+    watcher = None
+    if parse_bool(settings['watch_interfaces']):
+        watcher = AddressWatcher(threading.Event(), log).start()
+        log(f"Watching local addresses ({watcher.mode}).\n")
+    reloader = None
+    if settings['watch_config']:
+        reloader = ConfigWatcher(path, log).start()
+        log(f"Reloading {path} when it changes ({reloader.mode}).\n")
+    try:
+        auto_update(records, log, stop_event, on_cycle=log_connection_stats, cache=cache, check_now=True,
+                    reloader=reloader, watcher=watcher)
+    except KeyboardInterrupt:
+        stop_event.set()
+        log("Stopped.\n")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,15 @@
+from arvan_ddns import serve_fleet
+from arvan_ddns.headless import log, start
+
+
+def main():
+    path, settings, records, cache = start()
+    try:
+        serve_fleet(records, log, cache, settings['fleet_host'], int(settings['fleet_port']),
+                    float(settings['fleet_window']))
+    except KeyboardInterrupt:
+        log("Stopped.\n")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,22 @@
+from .api import (
+    get_public_ip, check_dns_record, read_dns_record, list_dns_records, index_records,
+    put_dns_record, reconcile_dns_record, update_dns_record, build_record_payload,
+)
+from .config import (
+    CONFIG_PATH, load_config, load_records, save_config,
+    parse_interval, parse_bool, parse_list, config_relative, dual_stack,
+)
+from .engine import configure, resolve_public_ips, run_cycle, apply_addresses, auto_update
+from .session import configure_session, get_session, connection_stats
+from .ratelimit import RateLimiter, configure_rate_limit, get_rate_limiter, rate_limit_stats
+from .resilience import CircuitBreaker, CircuitOpenError, configure_resilience, breaker_states
+from .model import Record, ConfigError, load_model, make_records
+from .state import StateCache, state_path
+from .debounce import ChangeGate, get_change_gate, reset_change_gate
+from .watcher import AddressWatcher
+from .reload import ConfigWatcher
+from .resolver import Resolver, configure_resolver, get_resolver
+from .logs import LogBuffer, start_file_log
+from .tracing import SamplingProfiler
+from .fleet import Coordinator, serve_fleet
+from . import metrics, tracing
@@ -0,0 +1,41 @@
+import statistics
+
+from .config import parse_interval
+
+
+BACKOFF = 2.0  # factor applied to the interval after every quiet check
+MAX_INTERVAL = 60 * 60  # seconds, when MaxInterval is not set
+HISTORY = 10  # IP changes remembered per record
+HISTORY_WINDOW = 30 * 24 * 60 * 60  # seconds; older changes no longer cap the interval
+
+
+def bounds(settings):
+    base = parse_interval(settings['interval'])
+    low = parse_interval(settings.get('min_interval')) or base
+    high = parse_interval(settings.get('max_interval')) or MAX_INTERVAL
+    return low, max(high, low)
+
+def initial_interval(settings, entry):
+    # Resume at the cadence saved before a restart
+    low, high = bounds(settings)
+    return min(max(entry.get('interval') or low, low), high)
+
+# Adaptive cadence: every quiet check multiplies the interval by
+# IntervalBackoff up to MaxInterval. A written change, a held one or an error
+# drops it back to MinInterval. Recent changes also cap the interval at half
+# their median spacing, so a link that changes every few hours is not polled
+# once a day just because it was quiet since the last change.
+def next_interval(settings, entry, outcome, now):
+    low, high = bounds(settings)
+    factor = float(settings.get('interval_backoff') or BACKOFF)
+    changes = [when for when in entry.get('changes', []) if now - when < HISTORY_WINDOW]
+    if outcome == 'updated':
+        changes = (changes + [now])[-HISTORY:]
+    if outcome == 'unchanged':
+        interval = min((entry.get('interval') or low) * factor, high)
+    else:
+        interval = low
+    gaps = [later - earlier for earlier, later in zip(changes, changes[1:])]
+    if gaps:
+        interval = min(interval, statistics.median(gaps) / 2)
+    return {'interval': max(interval, low), 'changes': changes}
@@ -0,0 +1,176 @@
+import ipaddress
+
+import requests
+
+from . import tracing
+from .resolver import get_resolver
+from .ratelimit import get_rate_limiter
+from .resilience import request
+
+
+API_BASE = "https://napi.arvancloud.ir/cdn/4.0"
+IP_SERVICE_URL = "https://api.ipify.org"
+IP6_SERVICE_URL = "https://api6.ipify.org"
+
+
+def _log(log, message):
+    if log is not None:
+        log(message)
+
+def request_headers(api_key):
+    return {
+        'Content-Type': 'application/json',
+        'Authorization': api_key
+    }
+
+RECORDS_PER_PAGE = 100
+
+
+def record_url(domain, record_id):
+    return f"{API_BASE}/domains/{domain}/dns-records/{record_id}"
+
+def zone_url(domain):
+    return f"{API_BASE}/domains/{domain}/dns-records"
+
+def ip_family(record_type):
+    return 'aaaa' if record_type.strip().lower() == 'aaaa' else 'a'
+
+def get_public_ip(log=None, record_type='a'):
+    return get_resolver().resolve(ip_family(record_type), log)
+
+def check_dns_record(api_key, domain, record_id, log=None):
+    return _read_record_ip(record_url(domain, record_id), request_headers(api_key), api_key, log)
+
+# Same as check_dns_record for a loaded Record, using its precomputed URL and headers
+def read_dns_record(record, log=None):
+    return _read_record_ip(record.url, record.headers, record.api_key, log)
+
+def _read_record_ip(url, headers, api_key, log):
+    try:
+        response = request('GET', url, headers=headers, limiter=get_rate_limiter(api_key), endpoint='arvan_get')
+    except requests.RequestException as e:
+        _log(log, f"API request failed while reading the DNS record: {e}\n")
+        return None
+    if response.status_code == 200:
+        with tracing.span('parse', endpoint='arvan_get'):
+            try:
+                return record_ip(response.json()["data"])
+            except (ValueError, KeyError, TypeError):
+                # e.g. a maintenance page served with 200
+                _log(log, f"Error: Unexpected reply while reading the DNS record: {response.text[:200]}\n")
+    return None
+
+def record_ip(record):
+    try:
+        value = record["value"][0]["ip"]
+    except (KeyError, IndexError, TypeError):
+        return None
+    # Compare addresses in canonical form: 2001:DB8::0001 is 2001:db8::1
+    try:
+        return str(ipaddress.ip_address(value.strip()))
+    except (ValueError, AttributeError):
+        return value
+
+# Reads every record of a zone in as few requests as the page size allows
+def list_dns_records(api_key, domain, log=None):
+    records = []
+    page = 1
+    while True:
+        try:
+            response = request('GET', zone_url(domain), params={'page': page, 'per_page': RECORDS_PER_PAGE},
+                               headers=request_headers(api_key), limiter=get_rate_limiter(api_key),
+                               endpoint='arvan_list')
+        except requests.RequestException as e:
+            _log(log, f"API request failed while listing the DNS records of {domain}: {e}\n")
+            return None
+        if response.status_code != 200:
+            _log(log, f"Error: Could not list the DNS records of {domain}: {response.text}\n")
+            return None
+        with tracing.span('parse', endpoint='arvan_list'):
+            try:
+                body = response.json()
+                data = body.get("data") or []
+                last_page = int((body.get("meta") or {}).get("last_page") or page)
+            except (ValueError, AttributeError, TypeError):
+                _log(log, f"Error: Unexpected reply while listing the DNS records of {domain}: "
+                          f"{response.text[:200]}\n")
+                return None
+        if not isinstance(data, list):
+            _log(log, f"Error: Unexpected reply while listing the DNS records of {domain}.\n")
+            return None
+        records.extend(data)
+        if page >= last_page:
+            return records
+        page += 1
+
+def index_records(records):
+    by_id = {}
+    by_name = {}
+    for record in records:
+        if not isinstance(record, dict):
+            continue
+        by_id[str(record.get("id"))] = record
+        by_name[(record.get("name"), str(record.get("type", "")).lower())] = record
+    return {'by_id': by_id, 'by_name': by_name}
+
+def build_record_payload(record_name, record_type, current_ip):
+    return {
+        "value": [
+            {
+                "ip": current_ip,
+                "port": 80,
+                "weight": 1000,
+                "country": "US"
+            }
+        ],
+        "type": record_type,
+        "name": record_name,
+        "ttl": 120,
+        "cloud": False,
+        "upstream_https": "default",
+        "ip_filter_mode": {
+            "count": "single",
+            "order": "none",
+            "geo_filter": "none"
+        }
+    }
+
+def put_dns_record(settings, current_ip, log=None):
+    record_name = settings['record_name']
+    data = build_record_payload(record_name, settings['record_type'], current_ip)
+
+    try:
+        response = request('PUT', settings.url, json=data, headers=settings.headers,
+                           limiter=get_rate_limiter(settings['api_key']), endpoint='arvan_put')
+        if response.status_code == 200:
+            _log(log, f"Success: DNS record for {record_name} updated successfully.\n")
+            return True
+        _log(log, f"Error: Failed to update DNS record for {record_name}: {response.text}\n")
+    except requests.RequestException as e:
+        _log(log, f"API request failed for {record_name}: {e}\n")
+    return False
+
+# Single pass: takes the IP and record value the caller already observed and
+# only issues the PUT, so a cycle never fetches either of them twice.
+def reconcile_dns_record(settings, current_ip, dns_record_ip, log=None):
+    record_name = settings['record_name']
+    if current_ip is None:
+        return False
+
+    if dns_record_ip == current_ip:
+        _log(log, f"Info: The IP address already matches the {settings['record_type'].strip().upper()} record "
+                  f"for {record_name} ({dns_record_ip}).\n")
+        return False
+
+    elif dns_record_ip is None:
+        _log(log, f"Error: Could not retrieve the DNS record for {record_name}.\n")
+        return False
+
+    return put_dns_record(settings, current_ip, log)
+
+def update_dns_record(settings, log=None):
+    current_ip = get_public_ip(log, settings.family)
+    if current_ip is None:
+        return False
+    dns_record_ip = read_dns_record(settings, log)
+    return reconcile_dns_record(settings, current_ip, dns_record_ip, log)
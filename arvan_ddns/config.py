@@ -0,0 +1,113 @@
+import configparser
+import os
+
+
+CONFIG_PATH = 'config.ini'
+
+# Mapping between the settings dict used by the engine and the config.ini keys
+FIELDS = (
+    ('api_key', 'ApiKey'),
+    ('record_name', 'RecordName'),
+    ('domain', 'Domain'),
+    ('record_id', 'RecordID'),
+    ('record_type', 'RecordType'),
+    ('interval', 'Interval'),
+)
+
+# Optional tuning keys that have no GUI field: (field, config.ini key, default)
+OPTIONS = (
+    ('pool_size', 'PoolSize', '10'),
+    ('timeout', 'Timeout', '10'),
+    ('connect_timeout', 'ConnectTimeout', '3.05'),
+    ('retries', 'Retries', '3'),
+    ('backoff_base', 'BackoffBase', '0.5'),
+    ('backoff_max', 'BackoffMax', '30'),
+    ('request_budget', 'RequestBudget', '30'),
+    ('breaker_threshold', 'BreakerThreshold', '5'),
+    ('breaker_reset', 'BreakerReset', '60'),
+    ('rate_limit', 'RateLimit', '10'),
+    ('rate_burst', 'RateBurst', '20'),
+    ('metrics_port', 'MetricsPort', ''),
+    ('metrics_host', 'MetricsHost', '127.0.0.1'),
+    ('metrics_file', 'MetricsFile', ''),
+    ('concurrency', 'Concurrency', '8'),
+    ('record_id6', 'RecordID6', ''),
+    ('check_mode', 'CheckMode', 'record'),
+    ('verify_every', 'VerifyEvery', '12'),
+    ('watch_interfaces', 'WatchInterfaces', 'no'),
+    ('watch_config', 'WatchConfig', 'yes'),
+    ('resolvers', 'Resolvers', 'ipify, icanhazip, opendns, local'),
+    ('resolver_ttl', 'ResolverTtl', '30'),
+    ('resolver_quorum', 'ResolverQuorum', '1'),
+    ('log_file', 'LogFile', 'ddns.log'),
+    ('log_max_bytes', 'LogMaxBytes', '1048576'),
+    ('log_backups', 'LogBackups', '3'),
+    ('log_lines', 'LogLines', '500'),
+    ('adaptive', 'Adaptive', 'no'),
+    ('min_interval', 'MinInterval', ''),
+    ('max_interval', 'MaxInterval', '60'),
+    ('interval_backoff', 'IntervalBackoff', '2'),
+    ('confirm_count', 'ConfirmCount', '0'),
+    ('confirm_seconds', 'ConfirmSeconds', '0'),
+    ('min_write_interval', 'MinWriteInterval', '0'),
+    ('write_burst', 'WriteBurst', '0'),
+    ('write_burst_window', 'WriteBurstWindow', '3600'),
+    ('token', 'Token', ''),
+    ('fleet_host', 'FleetHost', '127.0.0.1'),
+    ('fleet_port', 'FleetPort', '8245'),
+    ('fleet_window', 'FleetWindow', '1'),
+    ('trace', 'Trace', 'no'),
+    ('trace_file', 'TraceFile', 'ddns_trace.json'),
+    ('trace_format', 'TraceFormat', 'chrome'),
+    ('profile_file', 'ProfileFile', 'ddns_profile.txt'),
+)
+
+
+def save_config(settings, path=CONFIG_PATH):
+    config = configparser.ConfigParser(interpolation=None)
+    config.read(path)  # Keep keys the caller does not know about
+    for field, key in FIELDS:
+        config['DEFAULT'][key] = settings.get(field, '')
+    with open(path, 'w') as configfile:
+        config.write(configfile)
+
+def load_config(path=CONFIG_PATH):
+    config = configparser.ConfigParser(interpolation=None)
+    config.read(path)
+    settings = {field: config['DEFAULT'].get(key, '') for field, key in FIELDS}
+    for field, key, default in OPTIONS:
+        settings[field] = config['DEFAULT'].get(key, default)
+    return settings
+
+# Every section other than DEFAULT is one record and inherits ApiKey, Interval
+# and any other shared key from DEFAULT. A file without sections is the
+# classic single-record config written by the GUI. Returns model.Record
+# objects and raises model.ConfigError for invalid settings.
+def load_records(path=CONFIG_PATH):
+    from .model import load_model  # model builds on this module
+    return load_model(path)[1]
+
+# RecordID6 names the AAAA record kept in sync next to the record in
+# RecordID, so one section covers a dual-stack host.
+def dual_stack(settings):
+    records = []
+    record_id = settings['record_id'].strip()
+    if record_id:
+        records.append({**settings, 'record_id': record_id})
+    record_id6 = settings.get('record_id6', '').strip()
+    if record_id6:
+        records.append({**settings, 'record_id': record_id6, 'record_type': 'AAAA'})
+    return records
+
+# Relative paths in config.ini are relative to the file itself
+def config_relative(path, config_path=CONFIG_PATH):
+    return os.path.join(os.path.dirname(os.path.abspath(config_path)), path)
+
+def parse_list(value):
+    return [item.strip() for item in str(value).split(',') if item.strip()]
+
+def parse_bool(value):
+    return str(value).strip().lower() in ('1', 'yes', 'true', 'on')
+
+def parse_interval(interval_str):
+    return float(interval_str) * 60 if interval_str else 0  # Convert minutes to seconds
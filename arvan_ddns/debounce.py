@@ -0,0 +1,95 @@
+import collections
+import threading
+import time
+
+from .state import record_key
+
+
+CONFIRM_COUNT = 0  # observations of a new IP before it is written, 0 disables
+CONFIRM_SECONDS = 0  # or seconds the new IP has to stay put, 0 disables
+MIN_WRITE_INTERVAL = 0  # seconds between two writes of one record
+WRITE_BURST = 0  # writes allowed per WRITE_BURST_WINDOW, 0 disables the cap
+WRITE_BURST_WINDOW = 3600
+
+
+def _option(settings, field, default, cast):
+    value = settings.get(field)
+    return cast(value) if value not in (None, '') else default
+
+
+# Change-confirmation stage in front of the PUT. On a flapping link the
+# public IP can flip back before it is confirmed, and then nothing is
+# written at all. The per-record limits below come from each record's
+# settings, so a record section can override them.
+class ChangeGate:
+    def __init__(self, clock=time.monotonic):
+        self.clock = clock
+        self._records = {}
+        self._lock = threading.Lock()
+
+    def _entry(self, settings):
+        return self._records.setdefault(record_key(settings), {
+            'candidate': None, 'seen': 0, 'first_seen': None, 'diverged_at': None, 'writes': collections.deque(),
+        })
+
+    def check(self, settings, ip):
+        # None when ip may be written now, otherwise why it is held back
+        count = _option(settings, 'confirm_count', CONFIRM_COUNT, int)
+        seconds = _option(settings, 'confirm_seconds', CONFIRM_SECONDS, float)
+        min_interval = _option(settings, 'min_write_interval', MIN_WRITE_INTERVAL, float)
+        burst = _option(settings, 'write_burst', WRITE_BURST, int)
+        window = _option(settings, 'write_burst_window', WRITE_BURST_WINDOW, float)
+        now = self.clock()
+        with self._lock:
+            entry = self._entry(settings)
+            if entry['diverged_at'] is None:
+                entry['diverged_at'] = now
+            if entry['candidate'] != ip:
+                entry['candidate'], entry['seen'], entry['first_seen'] = ip, 0, now
+            entry['seen'] += 1
+            stable = now - entry['first_seen']
+            if (count > 0 or seconds > 0) and not (
+                    (count > 0 and entry['seen'] >= count) or (seconds > 0 and stable >= seconds)):
+                return f"seen {entry['seen']}/{count} times, stable for {stable:.0f}s"
+
+            writes = entry['writes']
+            while len(writes) > 1 and now - writes[0] >= window:
+                writes.popleft()
+            if min_interval > 0 and writes and now - writes[-1] < min_interval:
+                return f"last write {now - writes[-1]:.0f}s ago"
+            if burst > 0 and sum(1 for written in writes if now - written < window) >= burst:
+                return f"{burst} writes in the last {window:.0f}s"
+        return None
+
+    def wrote(self, settings):
+        # Returns how long the record was out of sync
+        now = self.clock()
+        with self._lock:
+            entry = self._entry(settings)
+            entry['writes'].append(now)
+            return self._settle(entry, now)
+
+    def in_sync(self, settings):
+        # The record already holds the public IP, e.g. the link flipped back
+        now = self.clock()
+        with self._lock:
+            entry = self._records.get(record_key(settings))
+            return None if entry is None else self._settle(entry, now)
+
+    @staticmethod
+    def _settle(entry, now):
+        diverged = entry['diverged_at']
+        entry['candidate'], entry['seen'], entry['first_seen'], entry['diverged_at'] = None, 0, None, None
+        return None if diverged is None else now - diverged
+
+
+_gate = ChangeGate()
+
+
+def get_change_gate():
+    return _gate
+
+def reset_change_gate(clock=time.monotonic):
+    global _gate
+    _gate = ChangeGate(clock)
+    return _gate
@@ -0,0 +1,349 @@
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+from .adaptive import initial_interval, next_interval
+from .api import (
+    get_public_ip, read_dns_record, list_dns_records, index_records, record_ip, reconcile_dns_record,
+)
+from . import metrics, tracing
+from .config import CONFIG_PATH, config_relative, parse_bool, parse_list
+from .debounce import get_change_gate
+from .ratelimit import configure_rate_limit
+from .resilience import configure_resilience
+from .resolver import configure_resolver, get_resolver
+from .scheduler import Scheduler
+from .session import configure_session
+
+
+_last_ips = {}
+_metrics_server = None
+_metrics_file = None
+_trace_file = None
+_trace_format = 'chrome'
+
+# Keys configure() reads; a reload re-applies them only when one changed,
+# since that rebuilds the resolver and resets the circuit breakers.
+TUNING_FIELDS = (
+    'pool_size', 'timeout', 'connect_timeout', 'retries', 'backoff_base', 'backoff_max', 'request_budget',
+    'breaker_threshold', 'breaker_reset', 'rate_limit', 'rate_burst', 'resolvers', 'resolver_ttl',
+    'resolver_quorum', 'metrics_port', 'metrics_host', 'metrics_file', 'trace', 'trace_file', 'trace_format',
+)
+# Record keys that only change when a record is checked, not what it writes
+TIMING_FIELDS = frozenset(('interval', 'adaptive', 'min_interval', 'max_interval', 'interval_backoff'))
+
+
+# Applies the process-wide tuning keys from config.ini
+def configure(settings, config_path=None):
+    global _metrics_server, _metrics_file, _trace_file, _trace_format
+    configure_session(int(settings['pool_size']), float(settings['timeout']), float(settings['connect_timeout']))
+    configure_resilience(int(settings['retries']), float(settings['backoff_base']), float(settings['backoff_max']),
+                         float(settings['request_budget']), int(settings['breaker_threshold']),
+                         float(settings['breaker_reset']))
+    configure_rate_limit(float(settings['rate_limit']), int(settings['rate_burst']))
+    configure_resolver(parse_list(settings['resolvers']), float(settings['resolver_ttl']),
+                       int(settings['resolver_quorum']))
+    if settings['metrics_port'] and _metrics_server is None:
+        _metrics_server = metrics.serve_metrics(int(settings['metrics_port']), settings['metrics_host'])
+    _metrics_file = None
+    if settings['metrics_file']:
+        _metrics_file = config_relative(settings['metrics_file'], config_path or CONFIG_PATH)
+    tracing.enable(parse_bool(settings['trace']))
+    _trace_file = None
+    if tracing.enabled() and settings['trace_file']:
+        _trace_file = config_relative(settings['trace_file'], config_path or CONFIG_PATH)
+    _trace_format = 'json' if settings['trace_format'].strip().lower() == 'json' else 'chrome'
+
+def _notify(callback, value):
+    if callback is not None:
+        callback(value)
+
+def _resolve_family(family, log):
+    with tracing.span('resolve_ip', family=family):
+        return get_public_ip(log, family)
+
+def resolve_public_ips(records, log):
+    # One lookup per address family per cycle, shared by every record of that
+    # family. A and AAAA are looked up side by side so a slow or missing IPv6
+    # path never delays the IPv4 records.
+    families = list(dict.fromkeys(settings.family for settings in records))
+    if len(families) > 1:
+        with ThreadPoolExecutor(max_workers=len(families)) as executor:
+            futures = {family: executor.submit(tracing.bind(_resolve_family), family, log) for family in families}
+            ips = {family: future.result() for family, future in futures.items()}
+    else:
+        ips = {family: _resolve_family(family, log) for family in families}
+    for family, ip in ips.items():
+        previous = _last_ips.get(family)
+        if ip is not None:
+            if previous is not None and previous != ip:
+                metrics.ip_changes.inc(family)
+            _last_ips[family] = ip
+    return ips
+
+def _zone_key(settings):
+    return settings['api_key'], settings['domain']
+
+def _list_zone(zone, log):
+    api_key, domain = zone
+    with tracing.span('list_zone', domain=domain):
+        records = list_dns_records(api_key, domain, log)
+    return None if records is None else index_records(records)
+
+def _observe_record(settings, log, zones):
+    # zones holds the listing future of each zone in zone mode. It runs on
+    # the same account's pool and was submitted first, so it is already
+    # running or done by the time a record waits on it.
+    future = zones.get(_zone_key(settings))
+    zone = future.result() if future is not None else None
+    if zone is None:
+        # Record mode, or the zone listing failed: fall back to a single GET
+        return read_dns_record(settings, log)
+    record = zone['by_id'].get(settings.record_id)
+    if record is None:
+        record = zone['by_name'].get((settings.record_name, settings.family))
+    return record_ip(record) if record is not None else None
+
+def _record_labels(settings):
+    return f"{settings.record_name}.{settings.domain}", settings.family
+
+def _reconcile_record(settings, current_ip, log, zones, cache):
+    with tracing.span('record', record='.'.join(_record_labels(settings))):
+        started = time.monotonic()
+        with tracing.span('check'):
+            dns_record_ip = _observe_record(settings, log, zones)
+        held = None
+        if dns_record_ip is not None and dns_record_ip != current_ip:
+            held = get_change_gate().check(settings, current_ip)
+        if held is not None:
+            log(f"Info: Holding new IP {current_ip} for {settings['record_name']} ({held}).\n")
+            metrics.writes_held.inc(*_record_labels(settings))
+            return 'held', time.monotonic() - started
+        with tracing.span('put'):
+            updated = current_ip != dns_record_ip and reconcile_dns_record(settings, current_ip, dns_record_ip, log)
+    converged = None
+    if updated:
+        metrics.updates.inc(*_record_labels(settings))
+        converged = get_change_gate().wrote(settings)
+    elif dns_record_ip == current_ip:
+        converged = get_change_gate().in_sync(settings)
+    if converged is not None:
+        metrics.convergence.observe(converged)
+    if updated or dns_record_ip == current_ip:
+        metrics.last_sync.set(time.time(), *_record_labels(settings))
+    synced = updated or dns_record_ip == current_ip
+    if cache is not None:
+        if synced:
+            cache.confirm(settings, current_ip, written=updated)
+        else:
+            cache.forget(settings)
+    status = 'updated' if updated else 'unchanged' if synced else 'failed'
+    return status, time.monotonic() - started
+
+def _account_limits(records):
+    # Concurrency is capped per ArvanCloud account (API key), not per process
+    limits = {}
+    for settings in records:
+        if settings['api_key'] not in limits:
+            limits[settings['api_key']] = max(int(settings.get('concurrency') or 1), 1)
+    return limits
+
+# With Trace enabled every cycle is one span tree (IP lookup, zone listings,
+# per-record check/put down to DNS, connect, TLS, request and parse) and the
+# last few cycles are rewritten to TraceFile after each run.
+def run_cycle(records, log, on_ip=None, cache=None):
+    with tracing.span('cycle', records=len(records)):
+        report = _run_cycle(records, log, on_ip, cache)
+    if _trace_file is not None:
+        tracing.dump(_trace_file, _trace_format)
+    return report
+
+def _run_cycle(records, log, on_ip, cache):
+    started = time.monotonic()
+    ips = resolve_public_ips(records, log)
+    _notify(on_ip, ips.get('a') or next(iter(ips.values()), None))
+
+    targets = [(settings, ips[settings.family]) for settings in records]
+    report = apply_addresses([(settings, ip) for settings, ip in targets if ip is not None], log, cache)
+    report['duration'] = time.monotonic() - started
+    metrics.cycle_duration.observe(report['duration'])
+    if cache is not None:
+        cache.save()
+    write_metrics()
+    # Only a fully quiet cycle; the GUI folds repeats of this line, so it must
+    # not stand in for failed lookups or held and failed records
+    statuses = list(report['results'].values())
+    if len(statuses) == len(records) and all(status == 'unchanged' for status in statuses):
+        log(f"No update necessary at {time.strftime('%Y-%m-%d %H:%M:%S')}.\n")
+    if len(records) > 1:
+        log(f"Checked {report['checked']} record(s) in {report['duration']:.2f}s ({report['skipped']} cached), "
+            f"slowest {report['slowest']} ({report['slowest_duration']:.2f}s).\n")
+    return report
+
+# Brings every (record, address) pair in line, whoever found the address:
+# the polling cycle above or hosts reporting to the fleet coordinator.
+# report['results'] maps each record key to 'updated', 'unchanged', 'held' or
+# 'failed'.
+def apply_addresses(targets, log, cache=None):
+    limits = _account_limits([settings for settings, _ in targets])
+    results = {}
+    pending = targets
+    if cache is not None:
+        # Records already confirmed at this IP need no read until their forced verification
+        pending = []
+        for settings, ip in targets:
+            verify_every = int(settings.get('verify_every') or 0)
+            if cache.is_fresh(settings, ip, verify_every):
+                results[settings.key] = 'unchanged'
+            else:
+                pending.append((settings, ip))
+    report = {'checked': len(pending), 'skipped': len(targets) - len(pending), 'updated': 0, 'duration': 0.0,
+              'slowest': None, 'slowest_duration': 0.0, 'results': results}
+    if pending:
+        accounts = {}
+        for settings, ip in pending:
+            accounts.setdefault(settings['api_key'], []).append((settings, ip))
+        # One pool of Concurrency workers per account, so a busy or slow
+        # account never queues the records of another one
+        executors = {api_key: ThreadPoolExecutor(max_workers=min(limits[api_key], len(items)),
+                                                 thread_name_prefix='reconcile')
+                     for api_key, items in accounts.items()}
+        try:
+            # Zone mode: one paginated listing per zone replaces a GET per record
+            zone_keys = {_zone_key(settings) for settings, _ in pending if settings.get('check_mode') == 'zone'}
+            zones = {zone: executors[zone[0]].submit(tracing.bind(_list_zone), zone, log) for zone in zone_keys}
+            futures = {
+                executors[settings['api_key']].submit(tracing.bind(_reconcile_record), settings, ip, log, zones,
+                                                      cache): settings
+                for settings, ip in pending
+            }
+            for future in as_completed(futures):
+                settings = futures[future]
+                # One broken record must not take the rest of the cycle down
+                status, duration = _result(future, ('failed', 0.0), log,
+                                           f"Checking {settings['record_name']}.{settings['domain']}")
+                results[settings.key] = status
+                report['updated'] += status == 'updated'
+                if duration >= report['slowest_duration']:
+                    report['slowest'] = f"{settings['record_name']}.{settings['domain']}"
+                    report['slowest_duration'] = duration
+        finally:
+            for executor in executors.values():
+                executor.shutdown()
+    return report
+
+def _result(future, default, log, what):
+    try:
+        return future.result()
+    except Exception as e:
+        log(f"Error: {what} failed: {e!r}\n")
+        return default
+
+def write_metrics():
+    if _metrics_file is not None:
+        metrics.write_textfile(_metrics_file)
+
+def auto_update(records, log, stop_event, on_countdown=None, on_ip=None, on_cycle=None, cache=None, wake_event=None,
+                check_now=False, on_deadline=None, reloader=None, watcher=None):
+    # Every record runs on its own Interval; records that fall due together
+    # share one cycle. on_deadline gets the monotonic time of the next check
+    # so front ends can draw a countdown without the engine waking up. With a
+    # reloader (a ConfigWatcher), a saved config is applied between cycles;
+    # a watcher (an AddressWatcher) makes every record due at once.
+    scheduler = Scheduler(wake_event)
+    active = {}  # record key -> Record
+    cadence = {}  # adaptive records only: the state next_interval() works on
+    for settings in records:
+        active[settings.key] = settings
+        _schedule(settings, scheduler, cadence, cache, delay=0 if check_now else None)
+    if reloader is not None:
+        reloader.listen(scheduler.interrupt)
+    if watcher is not None:
+        watcher.listen(scheduler.trigger)
+
+    while True:
+        _notify(on_deadline, scheduler.next_deadline())
+        due, triggered = scheduler.wait(stop_event)
+        if stop_event.is_set():
+            break
+        change = reloader.take() if reloader is not None else None
+        if change is not None:
+            _reload(change, active, cadence, scheduler, log, cache, reloader.path)
+            due = [key for key in due if key in active]
+        if not due:
+            continue
+        if triggered:
+            get_resolver().invalidate()  # An address changed, don't trust the cached IP
+        _notify(on_deadline, None)
+        _notify(on_countdown, "Checking...")
+        report = run_cycle([active[key] for key in due], log, on_ip, cache)
+        _adapt_intervals(active, due, report, cadence, scheduler, log, cache)
+        for key in due:
+            if active[key].interval_seconds <= 0:
+                scheduler.remove(key)  # Checked once, as it has no Interval
+        _notify(on_cycle, report)
+        _notify(on_countdown, "Update check completed.")
+        if reloader is None and not scheduler.keys():
+            break
+
+def _schedule(settings, scheduler, cadence, cache, delay=None):
+    interval = settings.interval_seconds
+    if interval <= 0:
+        scheduler.add(settings.key, 0, delay=0)  # Without an Interval: one check, right away
+        return
+    if settings.adaptive:
+        cadence[settings.key] = cache.get_cadence(settings) if cache is not None else {}
+        interval = initial_interval(settings, cadence[settings.key])
+    scheduler.add(settings.key, interval, delay=delay)
+
+# Applies a reloaded config by diffing record sets on their key. Removed
+# records leave the schedule, new ones are checked right away and changed
+# ones are rescheduled; a change beyond the timing keys is checked right away
+# too. Unchanged records keep their deadline, and the shared session, state
+# cache and change gate are left alone.
+def _reload(change, active, cadence, scheduler, log, cache, path):
+    previous, settings, records = change
+    if previous is None or any(previous[field] != settings[field] for field in TUNING_FIELDS):
+        configure(settings, path)
+    new = {record.key: record for record in records}
+    removed = [key for key in active if key not in new]
+    for key in removed:
+        del active[key]
+        cadence.pop(key, None)
+        scheduler.remove(key)
+    added = changed = 0
+    for key, settings in new.items():
+        old = active.get(key)
+        if old == settings:
+            continue
+        if old is None:
+            added += 1
+            delay = 0
+        else:
+            changed += 1
+            timing_only = all(old[field] == settings[field] for field in settings if field not in TIMING_FIELDS)
+            delay = None if timing_only else 0
+        active[key] = settings
+        cadence.pop(key, None)
+        scheduler.remove(key)
+        _schedule(settings, scheduler, cadence, cache, delay)
+    log(f"Reloaded {path}: {added} added, {len(removed)} removed, {changed} changed, "
+        f"{len(new) - added - changed} unchanged.\n")
+
+def _adapt_intervals(active, due, report, cadence, scheduler, log, cache):
+    now = time.time()
+    for key in due:
+        if key not in cadence:
+            continue
+        settings = active[key]
+        # Records missing from the results had no public IP this cycle: an error
+        outcome = report['results'].get(settings.key, 'failed')
+        previous = cadence[key].get('interval')
+        cadence[key] = next_interval(settings, cadence[key], outcome, now)
+        scheduler.reschedule(key, cadence[key]['interval'])
+        if cache is not None:
+            cache.set_cadence(settings, cadence[key])
+        if previous is not None and abs(cadence[key]['interval'] - previous) >= 1:
+            log(f"Next check of {settings['record_name']}.{settings['domain']} in "
+                f"{cadence[key]['interval'] / 60:.1f} min.\n")
+    if cache is not None:
+        cache.save()
@@ -0,0 +1,242 @@
+import asyncio
+import base64
+import hmac
+import ipaddress
+import time
+from urllib.parse import parse_qs, urlsplit
+
+from . import engine, metrics
+
+
+FLEET_HOST = '127.0.0.1'
+FLEET_PORT = 8245
+BATCH_WINDOW = 1.0  # seconds reports are collected before they are applied
+IDLE_TIMEOUT = 15  # seconds a keep-alive connection may sit idle
+MAX_BODY = 64 * 1024
+BACKLOG = 1024
+
+REASONS = {200: 'OK', 400: 'Bad Request', 401: 'Unauthorized', 404: 'Not Found', 405: 'Method Not Allowed'}
+
+
+def hostname(settings):
+    name = settings['record_name'].strip()
+    domain = settings['domain'].strip()
+    return (domain if name in ('', '@') else f"{name}.{domain}").lower()
+
+def _credentials(header):
+    # Basic auth; the dyndns2 user name is not checked, only the record's Token
+    scheme, _, value = (header or '').partition(' ')
+    if scheme.lower() != 'basic':
+        return None
+    try:
+        _, _, password = base64.b64decode(value.strip()).decode().partition(':')
+    except (ValueError, UnicodeDecodeError):
+        return None
+    return password
+
+def _addresses(query, peer):
+    values = []
+    for key in ('myip', 'myipv6'):
+        for value in query.get(key, []):
+            values.extend(part.strip() for part in value.split(',') if part.strip())
+    if not values:
+        values = [peer]  # No myip: the address the report came from
+    addresses = []
+    for value in values:
+        try:
+            addresses.append(ipaddress.ip_address(value))
+        except ValueError:
+            return None
+    return addresses
+
+
+# dyndns2-style coordinator: edge hosts call
+#   GET /nic/update?hostname=home.example.com&myip=203.0.113.7
+# with their record's Token as the basic-auth password. Reports are collected
+# for BATCH_WINDOW seconds, deduplicated per record (the latest address
+# wins) and applied together through the pooled, rate-limited engine, so the
+# answer to every client in a batch comes from one pass over the API.
+class Coordinator:
+    def __init__(self, records, log, cache=None, window=BATCH_WINDOW):
+        self.log = log
+        self.cache = cache
+        self.window = window
+        self.hosts = {}
+        for settings in records:
+            if settings.get('token'):
+                self.hosts.setdefault(hostname(settings), []).append(settings)
+        self._pending = {}  # record key -> [settings, ip, future]
+        self._flush_handle = None
+        self._flush_task = None
+        self._apply_lock = None
+        self._server = None
+
+    async def start(self, host=FLEET_HOST, port=FLEET_PORT):
+        self._apply_lock = asyncio.Lock()
+        self._server = await asyncio.start_server(self._handle, host, port, backlog=BACKLOG)
+        return self
+
+    @property
+    def port(self):
+        return self._server.sockets[0].getsockname()[1]
+
+    async def serve_forever(self):
+        async with self._server:
+            await self._server.serve_forever()
+
+    def report(self, settings, ip):
+        # Reports for a record already waiting in this batch share its future
+        loop = asyncio.get_running_loop()
+        key = settings.key
+        entry = self._pending.get(key)
+        if entry is None:
+            entry = self._pending[key] = [settings, ip, loop.create_future()]
+        entry[1] = ip
+        if self._flush_handle is None:
+            self._flush_handle = loop.call_later(self.window, self._start_flush)
+        return entry[2]
+
+    def _start_flush(self):
+        self._flush_task = asyncio.ensure_future(self._flush())
+
+    async def _flush(self):
+        self._flush_handle = None
+        batch, self._pending = self._pending, {}
+        if not batch:
+            return
+        # One batch at a time, so two PUTs for a record can't overtake each other
+        async with self._apply_lock:
+            started = time.monotonic()
+            targets = [(settings, ip) for settings, ip, _ in batch.values()]
+            try:
+                report = await asyncio.get_running_loop().run_in_executor(None, self._apply, targets)
+            except Exception as e:
+                self.log(f"Error: Applying {len(batch)} fleet report(s) failed: {e}\n")
+                report = {'updated': 0, 'results': {}}
+            for key, (_, ip, future) in batch.items():
+                if not future.done():
+                    future.set_result((report['results'].get(key, 'failed'), ip))
+            self.log(f"Applied {len(batch)} fleet report(s) in {time.monotonic() - started:.2f}s, "
+                     f"{report['updated']} updated.\n")
+
+    def _apply(self, targets):
+        report = engine.apply_addresses(targets, self.log, self.cache)
+        if self.cache is not None:
+            self.cache.save()
+        engine.write_metrics()
+        return report
+
+    async def update(self, query, password, peer):
+        # Returns (status, body) for one /nic/update call
+        names = [name.strip().lower() for value in query.get('hostname', []) for name in value.split(',')]
+        names = [name for name in names if name]
+        if not names:
+            return 400, 'notfqdn'
+        addresses = _addresses(query, peer)
+        if addresses is None:
+            return 400, 'badrequest'
+
+        lines = []
+        waits = []
+        for name in names:
+            records = self.hosts.get(name)
+            if not records:
+                lines.append('nohost')
+                continue
+            if password is None or not any(hmac.compare_digest(password.encode(), settings['token'].encode())
+                                           for settings in records):
+                lines.append('badauth')
+                continue
+            futures = []
+            for address in addresses:
+                family = 'a' if address.version == 4 else 'aaaa'
+                for settings in records:
+                    if settings.family == family:
+                        futures.append(self.report(settings, str(address)))
+            lines.append(None)
+            waits.append((len(lines) - 1, futures))
+
+        for index, futures in waits:
+            if not futures:
+                lines[index] = 'nohost'  # No record of the reported address family
+                continue
+            outcomes = await asyncio.gather(*futures)
+            statuses = {status for status, _ in outcomes}
+            ips = ' '.join(dict.fromkeys(ip for _, ip in outcomes))
+            if 'failed' in statuses:
+                result = '911'
+            elif 'updated' in statuses:
+                result = f"good {ips}"
+            else:
+                result = f"nochg {ips}"
+            lines[index] = result
+        for line in lines:
+            metrics.fleet_reports.inc(line.split()[0])
+        status = 401 if lines and all(line == 'badauth' for line in lines) else 200
+        return status, '\n'.join(lines)
+
+    async def _route(self, method, target, headers, peer):
+        url = urlsplit(target)
+        if url.path != '/nic/update':
+            return 404, 'notfound'
+        if method not in ('GET', 'POST'):
+            return 405, 'badrequest'
+        query = parse_qs(url.query)
+        return await self.update(query, _credentials(headers.get('authorization')), peer)
+
+    async def _handle(self, reader, writer):
+        peer = writer.get_extra_info('peername')[0]
+        try:
+            while True:
+                try:
+                    head = await asyncio.wait_for(reader.readuntil(b'\r\n\r\n'), IDLE_TIMEOUT)
+                except (asyncio.IncompleteReadError, asyncio.LimitOverrunError, asyncio.TimeoutError,
+                        ConnectionError):
+                    break
+                lines = head.decode('latin-1').split('\r\n')
+                try:
+                    method, target, version = lines[0].split(' ', 2)
+                except ValueError:
+                    break
+                headers = {}
+                for line in lines[1:]:
+                    name, sep, value = line.partition(':')
+                    if sep:
+                        headers[name.strip().lower()] = value.strip()
+                try:
+                    length = int(headers.get('content-length') or 0)
+                except ValueError:
+                    break
+                if not 0 <= length <= MAX_BODY:
+                    break
+                if length:
+                    await reader.readexactly(length)
+
+                status, body = await self._route(method, target, headers, peer)
+                keep_alive = version == 'HTTP/1.1' and headers.get('connection', '').lower() != 'close'
+                payload = body.encode()
+                response = [
+                    f"HTTP/1.1 {status} {REASONS[status]}",
+                    "Content-Type: text/plain; charset=utf-8",
+                    f"Content-Length: {len(payload)}",
+                    f"Connection: {'keep-alive' if keep_alive else 'close'}",
+                ]
+                if status == 401:
+                    response.append('WWW-Authenticate: Basic realm="arvan-ddns"')
+                writer.write(('\r\n'.join(response) + '\r\n\r\n').encode() + payload)
+                await writer.drain()
+                if not keep_alive:
+                    break
+        except (asyncio.IncompleteReadError, ConnectionError):
+            pass
+        finally:
+            writer.close()
+
+
+def serve_fleet(records, log, cache=None, host=FLEET_HOST, port=FLEET_PORT, window=BATCH_WINDOW):
+    async def main():
+        coordinator = await Coordinator(records, log, cache, window).start(host, port)
+        log(f"Fleet coordinator listening on {host}:{coordinator.port} for {len(coordinator.hosts)} host name(s)\n")
+        await coordinator.serve_forever()
+
+    asyncio.run(main())
@@ -0,0 +1,249 @@
+import atexit
+import os
+import queue
+import threading
+import time
+import tkinter as tk
+from tkinter import messagebox
+
+from . import api, config, engine, model, tracing
+from .logs import LogBuffer, start_file_log
+from .reload import ConfigWatcher
+from .state import StateCache, state_path
+from .watcher import AddressWatcher
+
+
+DRAIN_INTERVAL = 100  # ms between UI queue drains
+COUNTDOWN_INTERVAL = 1000  # ms between countdown redraws
+
+
+# Tk is not thread-safe, so worker threads never touch widgets. They post
+# events here and the Tk main loop applies them in batches: all queued log
+# lines become one insert, and only the latest value of every other kind
+# (countdown, IP, ...) is drawn.
+class UiBridge:
+    def __init__(self, root, interval=DRAIN_INTERVAL):
+        self.root = root
+        self.interval = interval
+        self.handlers = {}
+        self._queue = queue.SimpleQueue()
+
+    def register(self, kind, handler):
+        self.handlers[kind] = handler
+
+    def post(self, kind, value=None):
+        self._queue.put((kind, value))
+
+    def call(self, func, *args):
+        self._queue.put(('call', (func, args)))
+
+    def start(self):
+        self.root.after(self.interval, self._drain)
+
+    def _drain(self):
+        lines = []
+        latest = {}
+        calls = []
+        while True:
+            try:
+                kind, value = self._queue.get_nowait()
+            except queue.Empty:
+                break
+            if kind == 'log':
+                lines.append(value)
+            elif kind == 'call':
+                calls.append(value)
+            else:
+                latest[kind] = value
+        if lines or latest or calls:
+            # Tk redraws show up in the trace as their own short spans
+            with tracing.span('ui_drain', lines=len(lines), calls=len(calls)):
+                if lines:
+                    self.handlers['log'](''.join(lines))
+                for kind, value in latest.items():
+                    self.handlers[kind](value)
+                for func, args in calls:
+                    func(*args)
+        self.root.after(self.interval, self._drain)
+
+
+# Shared controller for the themed front ends. The theme scripts only build
+# widgets and hand them to bind(); everything else lives here.
+class Controller:
+    IP_PLACEHOLDER = "Detecting..."
+
+    def __init__(self, root):
+        self.root = root
+        self.ui = UiBridge(root)
+        self.stop_event = threading.Event()
+        self.wake_event = threading.Event()
+        self.deadline = None
+        self.log_buffer = LogBuffer()
+        self.file_log = None
+        self.entries = {}
+        self.ip_label = None
+        self.countdown_label = None
+        self.result_text = None
+
+    def bind(self, entries, ip_label, countdown_label, result_text):
+        self.entries = entries
+        self.ip_label = ip_label
+        self.countdown_label = countdown_label
+        self.result_text = result_text
+        self.ui.register('log', self._append_log)
+        self.ui.register('countdown', lambda text: self.countdown_label.config(text=text))
+        self.ui.register('ip', lambda ip: self.ip_label.config(text=ip))
+        self.ui.register('deadline', self._set_deadline)
+
+    # Safe to call from any thread
+    def insert_text(self, message):
+        if self.file_log is not None:
+            self.file_log(message)
+        self.ui.post('log', message)
+
+    # Applies the ring buffer's edits, so the widget keeps at most
+    # LogLines lines and quiet cycles fold into one counted line.
+    def _append_log(self, message):
+        self.result_text.configure(state=tk.NORMAL)
+        for edit in self.log_buffer.add(message):
+            if edit[0] == 'append':
+                self.result_text.insert(tk.END, edit[1] + "\n")
+            elif edit[0] == 'replace':
+                line = edit[1] + 1
+                self.result_text.delete(f"{line}.0", f"{line}.end")
+                self.result_text.insert(f"{line}.0", edit[2])
+            else:
+                self.result_text.delete("1.0", f"{edit[1] + 1}.0")
+        self.result_text.see(tk.END)
+        self.result_text.configure(state=tk.DISABLED)
+
+    def _start_file_log(self, settings):
+        self.log_buffer.max_lines = int(settings['log_lines'])
+        if settings['log_file'] and self.file_log is None:
+            self.file_log, listener = start_file_log(config.config_relative(settings['log_file']),
+                                                     int(settings['log_max_bytes']), int(settings['log_backups']))
+            # Flushes the lines still queued when the window is closed
+            atexit.register(listener.stop)
+
+    def _set_deadline(self, deadline):
+        self.deadline = deadline
+        self._draw_countdown()
+
+    def _draw_countdown(self):
+        if self.deadline is not None:
+            remaining = max(int(self.deadline - time.monotonic()), 0)
+            mins, secs = divmod(remaining, 60)
+            self.countdown_label.config(text=f"Next check in: {mins:02d}:{secs:02d}")
+
+    # Redraws the countdown on the Tk thread; the engine only reports deadlines
+    def _tick_countdown(self):
+        self._draw_countdown()
+        self.root.after(COUNTDOWN_INTERVAL, self._tick_countdown)
+
+    def settings(self):
+        return {field: entry.get() for field, entry in self.entries.items()}
+
+    # Save and Load config file
+    def save_config(self):
+        config.save_config(self.settings())
+        messagebox.showinfo("Info", "Configuration saved successfully.")
+
+    def load_config(self, settings=None):
+        if settings is None:
+            settings = config.load_config()
+        for field, entry in self.entries.items():
+            entry.delete(0, tk.END)
+            entry.insert(0, settings.get(field, ''))
+
+    def _records(self):
+        # Tuning keys without a GUI field come from config.ini, where RecordID6
+        # adds the AAAA record of a dual-stack host. Checked here, on the Tk
+        # thread, so mistakes show up as a dialog instead of in a worker.
+        try:
+            return model.make_records([('DEFAULT', {**config.load_config(), **self.settings()})])
+        except model.ConfigError as e:
+            messagebox.showerror("Error", f"Please fix these settings:\n{e}")
+            return None
+
+    # What a saved config.ini means to the GUI: the record in its DEFAULT
+    # section, as _records() builds it from the fields
+    @staticmethod
+    def _load_records(path):
+        settings = config.load_config(path)
+        return model.typed_settings(settings), model.make_records([('DEFAULT', settings)])
+
+    def update_dns_record(self):
+        records = self._records()
+        if records:
+            threading.Thread(target=self._update_dns_records, args=(records,), daemon=True).start()
+
+    def _update_dns_records(self, records):
+        for record in records:
+            api.update_dns_record(record, self.insert_text)
+
+    # Saving the config while auto update runs applies it on the fly
+    def auto_update(self, records, check_now=False):
+        watcher = None
+        if records[0].watch_interfaces:
+            watcher = AddressWatcher(self.wake_event, self.insert_text).start()
+        reloader = None
+        if records[0].watch_config:
+            reloader = ConfigWatcher(config.CONFIG_PATH, self.insert_text, self._load_records).start()
+        engine.auto_update(
+            records,
+            self.insert_text,
+            self.stop_event,
+            on_countdown=lambda text: self.ui.post('countdown', text),
+            on_ip=lambda ip: self.ui.post('ip', ip),
+            cache=StateCache(state_path(config.CONFIG_PATH)).load(),
+            wake_event=self.wake_event,
+            check_now=check_now,
+            on_deadline=lambda deadline: self.ui.post('deadline', deadline),
+            reloader=reloader,
+            watcher=watcher,
+        )
+        self.ui.post('deadline', None)
+        if watcher is not None:
+            watcher.stop()
+        if reloader is not None:
+            reloader.stop()
+
+    def start_auto_update(self, check_now=False):
+        records = self._records()
+        if not records:
+            return
+        self.stop_event.clear()
+        self.wake_event.clear()
+        threading.Thread(target=self.auto_update, args=(records, check_now), daemon=True).start()
+
+    def stop_auto_update(self):
+        self.stop_event.set()
+        self.wake_event.set()
+
+    # The window is shown right away; reading config.ini and the first IP
+    # lookup happen on a worker thread and fill in the widgets when done.
+    def _startup(self):
+        settings = None
+        tuning = config.load_config(os.devnull)  # Built-in defaults
+        if os.path.exists(config.CONFIG_PATH):
+            settings = config.load_config()
+            errors = []
+            model.typed_settings(settings, errors=errors)
+            if not errors:  # Otherwise start_auto_update() reports them
+                tuning = settings
+                engine.configure(settings)
+        self._start_file_log(tuning)
+        current_ip = api.get_public_ip(self.insert_text)
+        self.ui.call(self._startup_done, settings, current_ip)
+
+    def _startup_done(self, settings, current_ip):
+        self.ip_label.config(text=current_ip or "Unavailable")
+        if settings is not None:
+            self.load_config(settings)
+            self.start_auto_update(check_now=True)
+
+    def run(self):
+        self.ui.start()
+        self._tick_countdown()
+        threading.Thread(target=self._startup, daemon=True).start()
+        self.root.mainloop()
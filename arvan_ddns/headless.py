@@ -0,0 +1,38 @@
+import atexit
+import sys
+import time
+
+from .config import CONFIG_PATH, config_relative
+from .engine import configure
+from .logs import start_file_log
+from .model import ConfigError, load_model
+from .state import StateCache, state_path
+
+
+_file_log = None
+
+
+# Timestamped lines on stdout, mirrored to LogFile once start() opened it
+def log(message):
+    print(f"[{time.strftime('%Y-%m-%d %H:%M:%S')}] {message}", end='', flush=True)
+    if _file_log is not None:
+        _file_log(message)
+
+# Startup shared by the headless entry points (ArvanDDNS_daemon.py and
+# ArvanDDNS_fleet.py): loads the config named on the command line, exits
+# with its errors, opens the file log and applies the tuning keys.
+# Returns (path, settings, records, cache).
+def start(argv=None):
+    global _file_log
+    argv = sys.argv if argv is None else argv
+    path = argv[1] if len(argv) > 1 else CONFIG_PATH
+    try:
+        settings, records = load_model(path)
+    except ConfigError as e:
+        sys.exit(f"{path}:\n{e}")
+    if settings['log_file']:
+        _file_log, listener = start_file_log(config_relative(settings['log_file'], path),
+                                             int(settings['log_max_bytes']), int(settings['log_backups']))
+        atexit.register(listener.stop)
+    configure(settings, path)
+    return path, settings, records, StateCache(state_path(path)).load()
@@ -0,0 +1,85 @@
+import logging
+import logging.handlers
+import queue
+from collections import deque
+
+
+MAX_LINES = 500
+LOG_MAX_BYTES = 1024 * 1024
+LOG_BACKUPS = 3
+
+# Lines that repeat every quiet cycle; consecutive ones are folded into one
+# line with a repeat counter.
+COLLAPSIBLE = ("No update necessary", "Checked ")
+
+
+def _collapsible(line):
+    return next((prefix for prefix in COLLAPSIBLE if line.startswith(prefix)), None)
+
+
+# Ring buffer behind the log widget. add() returns the edits the view has to
+# make so the widget never holds more than max_lines lines:
+#   ('append', text), ('replace', index, text), ('trim', count)
+class LogBuffer:
+    def __init__(self, max_lines=MAX_LINES):
+        self.lines = deque()  # [prefix, text, repeats]
+        self.max_lines = max_lines
+
+    @staticmethod
+    def _render(entry):
+        _, text, repeats = entry
+        return text if repeats == 1 else f"{text} (x{repeats})"
+
+    def _find_run(self, prefix):
+        # Look back through the trailing run of collapsible lines only
+        for index in range(len(self.lines) - 1, -1, -1):
+            entry = self.lines[index]
+            if entry[0] is None:
+                return None
+            if entry[0] == prefix:
+                return index
+        return None
+
+    def add(self, message):
+        edits = []
+        for line in message.splitlines():
+            if not line:
+                continue
+            prefix = _collapsible(line)
+            index = self._find_run(prefix) if prefix is not None else None
+            if index is not None:
+                entry = self.lines[index]
+                entry[1] = line
+                entry[2] += 1
+                edits.append(('replace', index, self._render(entry)))
+                continue
+            self.lines.append([prefix, line, 1])
+            edits.append(('append', line))
+        overflow = len(self.lines) - self.max_lines
+        if overflow > 0:
+            for _ in range(overflow):
+                self.lines.popleft()
+            edits.append(('trim', overflow))
+        return edits
+
+
+# Full history goes to a size-rotated file. Records are handed to a
+# QueueListener so the caller never waits on disk I/O.
+def start_file_log(path, max_bytes=LOG_MAX_BYTES, backups=LOG_BACKUPS):
+    handler = logging.handlers.RotatingFileHandler(path, maxBytes=max_bytes, backupCount=backups, encoding='utf-8')
+    handler.setFormatter(logging.Formatter('%(asctime)s %(message)s'))
+    records = queue.SimpleQueue()
+    listener = logging.handlers.QueueListener(records, handler)
+    listener.start()
+
+    logger = logging.getLogger('arvan_ddns.history')
+    logger.setLevel(logging.INFO)
+    logger.propagate = False
+    logger.handlers = [logging.handlers.QueueHandler(records)]
+
+    def write(message):
+        for line in message.splitlines():
+            if line:
+                logger.info(line)
+
+    return write, listener
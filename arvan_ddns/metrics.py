@@ -0,0 +1,165 @@
+import os
+import threading
+import time
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+
+
+LATENCY_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30)
+CYCLE_BUCKETS = (0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120)
+CONVERGENCE_BUCKETS = (1, 10, 30, 60, 120, 300, 600, 1800, 3600, 7200)
+
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+def _labels(names, values, extra=()):
+    pairs = list(zip(names, values)) + list(extra)
+    if not pairs:
+        return ''
+    return '{' + ','.join(f'{name}="{_escape(value)}"' for name, value in pairs) + '}'
+
+def _number(value):
+    if value == float('inf'):
+        return '+Inf'
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+# Minimal Prometheus-style metrics: no external client library, rendered in
+# the text exposition format.
+class Metric:
+    kind = None
+
+    def __init__(self, name, help, labels=()):
+        self.name = name
+        self.help = help
+        self.label_names = tuple(labels)
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def _header(self):
+        return [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} {self.kind}"]
+
+
+class Counter(Metric):
+    kind = 'counter'
+
+    def inc(self, *labels, amount=1):
+        with self._lock:
+            self._values[labels] = self._values.get(labels, 0) + amount
+
+    def render(self):
+        with self._lock:
+            return self._header() + [f"{self.name}{_labels(self.label_names, key)} {_number(value)}"
+                                     for key, value in sorted(self._values.items())]
+
+
+class Gauge(Metric):
+    kind = 'gauge'
+
+    def set(self, value, *labels):
+        with self._lock:
+            self._values[labels] = value
+
+    def get(self, *labels):
+        with self._lock:
+            return self._values.get(labels)
+
+    def items(self):
+        with self._lock:
+            return list(self._values.items())
+
+    def render(self):
+        with self._lock:
+            return self._header() + [f"{self.name}{_labels(self.label_names, key)} {_number(value)}"
+                                     for key, value in sorted(self._values.items())]
+
+
+class Histogram(Metric):
+    kind = 'histogram'
+
+    def __init__(self, name, help, labels=(), buckets=LATENCY_BUCKETS):
+        super().__init__(name, help, labels)
+        self.buckets = tuple(buckets) + (float('inf'),)
+
+    def observe(self, value, *labels):
+        with self._lock:
+            series = self._values.get(labels)
+            if series is None:
+                series = self._values[labels] = {'counts': [0] * len(self.buckets), 'sum': 0.0, 'count': 0}
+            for index, bound in enumerate(self.buckets):
+                if value <= bound:
+                    series['counts'][index] += 1
+            series['sum'] += value
+            series['count'] += 1
+
+    def render(self):
+        lines = self._header()
+        with self._lock:
+            for key, series in sorted(self._values.items()):
+                for bound, count in zip(self.buckets, series['counts']):
+                    labels = _labels(self.label_names, key, [('le', _number(bound))])
+                    lines.append(f"{self.name}_bucket{labels} {count}")
+                lines.append(f"{self.name}_sum{_labels(self.label_names, key)} {_number(series['sum'])}")
+                lines.append(f"{self.name}_count{_labels(self.label_names, key)} {series['count']}")
+        return lines
+
+
+cycle_duration = Histogram('ddns_cycle_duration_seconds', "Wall-clock time of one reconcile cycle.",
+                           buckets=CYCLE_BUCKETS)
+request_duration = Histogram('ddns_request_duration_seconds', "Latency of HTTP requests by endpoint.",
+                             labels=('endpoint',))
+request_failures = Counter('ddns_request_failures_total', "Failed HTTP requests by endpoint and status code.",
+                           labels=('endpoint', 'code'))
+updates = Counter('ddns_updates_total', "DNS records rewritten.", labels=('record', 'type'))
+last_sync = Gauge('ddns_record_last_sync_timestamp_seconds', "Unix time the record was last confirmed or written.",
+                  labels=('record', 'type'))
+sync_age = Gauge('ddns_record_sync_age_seconds', "Seconds since the record was last confirmed or written.",
+                 labels=('record', 'type'))
+ip_changes = Counter('ddns_ip_changes_total', "Public IP changes observed.", labels=('family',))
+writes_held = Counter('ddns_writes_held_total', "Writes held back by the change-confirmation stage.",
+                      labels=('record', 'type'))
+convergence = Histogram('ddns_convergence_seconds', "Time a record spent out of sync with the public IP.",
+                        buckets=CONVERGENCE_BUCKETS)
+fleet_reports = Counter('ddns_fleet_reports_total', "Host reports answered by the fleet coordinator.",
+                        labels=('result',))
+
+REGISTRY = [cycle_duration, request_duration, request_failures, updates, last_sync, sync_age, ip_changes,
+            writes_held, convergence, fleet_reports]
+
+
+def render():
+    now = time.time()
+    for labels, timestamp in last_sync.items():
+        sync_age.set(round(now - timestamp, 3), *labels)
+    lines = []
+    for metric in REGISTRY:
+        lines.extend(metric.render())
+    return '\n'.join(lines) + '\n'
+
+def write_textfile(path):
+    # Atomic replace, as node_exporter's textfile collector expects
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_path, 'w') as f:
+        f.write(render())
+    os.replace(tmp_path, path)
+
+def serve_metrics(port, host='127.0.0.1'):
+    class MetricsHandler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            if self.path.split('?')[0] != '/metrics':
+                self.send_error(404)
+                return
+            body = render().encode()
+            self.send_response(200)
+            self.send_header('Content-Type', 'text/plain; version=0.0.4; charset=utf-8')
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer((host, port), MetricsHandler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
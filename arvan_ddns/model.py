@@ -0,0 +1,205 @@
+import configparser
+import json
+import os
+from collections.abc import Mapping
+
+try:
+    import tomllib
+except ImportError:  # Python < 3.11
+    tomllib = None
+
+from .api import ip_family, record_url, request_headers
+from .config import CONFIG_PATH, FIELDS, OPTIONS, dual_stack, parse_bool, parse_interval, parse_list
+from .resolver import default_backends
+
+
+RECORD_TYPES = ('a', 'aaaa')
+
+INT_FIELDS = frozenset((
+    'pool_size', 'retries', 'breaker_threshold', 'rate_burst', 'concurrency', 'verify_every', 'resolver_quorum',
+    'log_max_bytes', 'log_backups', 'log_lines', 'confirm_count', 'write_burst', 'fleet_port',
+))
+FLOAT_FIELDS = frozenset((
+    'timeout', 'connect_timeout', 'backoff_base', 'backoff_max', 'request_budget', 'breaker_reset', 'rate_limit',
+    'resolver_ttl', 'confirm_seconds', 'min_write_interval', 'write_burst_window', 'interval_backoff',
+    'fleet_window',
+))
+MINUTE_FIELDS = frozenset(('interval', 'min_interval', 'max_interval'))  # empty means unset
+OPTIONAL_INT_FIELDS = frozenset(('metrics_port',))
+BOOL_FIELDS = frozenset(('watch_interfaces', 'watch_config', 'adaptive', 'trace'))
+CHOICES = {'check_mode': ('record', 'zone'), 'trace_format': ('chrome', 'json')}
+
+KEYS = dict(FIELDS + tuple((field, key) for field, key, _ in OPTIONS))
+DEFAULTS = {field: default for field, _, default in OPTIONS}
+
+
+class ConfigError(ValueError):
+    def __init__(self, errors):
+        self.errors = list(errors)
+        super().__init__('\n'.join(self.errors))
+
+
+def _convert(field, value, where, errors):
+    # Values from config.ini are text; TOML and JSON may already be typed
+    key = KEYS[field]
+    text = '' if value is None else str(value).strip()
+    try:
+        if field in MINUTE_FIELDS or field in OPTIONAL_INT_FIELDS:
+            if text == '':
+                return ''
+            number = float(text) if field in MINUTE_FIELDS else int(text)
+            if number < 0:
+                raise ValueError
+            return number
+        if field in INT_FIELDS:
+            return int(text)
+        if field in FLOAT_FIELDS:
+            return float(text)
+    except ValueError:
+        errors.append(f"[{where}] {key}: {value!r} is not a valid number")
+        return value
+    if field in BOOL_FIELDS:
+        if text.lower() not in ('1', 'yes', 'true', 'on', '0', 'no', 'false', 'off', ''):
+            errors.append(f"[{where}] {key}: {value!r} is not yes or no")
+        return parse_bool(text)
+    if field in CHOICES and text.lower() not in CHOICES[field]:
+        errors.append(f"[{where}] {key}: {value!r} is not one of {', '.join(CHOICES[field])}")
+    return text
+
+
+# One DNS record, parsed and checked once at load time. The URL, headers,
+# address family and interval every cycle needs are computed here instead
+# of being re-derived from text on each check. Records still read like the
+# settings dicts (record['api_key'], record.get(...)), so code written
+# against those keeps working.
+class Record(Mapping):
+    __slots__ = tuple(KEYS) + ('family', 'interval_seconds', 'url', 'headers', 'key')
+
+    def __init__(self, settings):
+        for field in KEYS:
+            object.__setattr__(self, field, settings[field])
+        object.__setattr__(self, 'family', ip_family(self.record_type))
+        object.__setattr__(self, 'interval_seconds', parse_interval(self.interval))
+        object.__setattr__(self, 'url', record_url(self.domain, self.record_id))
+        object.__setattr__(self, 'headers', request_headers(self.api_key))
+        object.__setattr__(self, 'key', f"{self.domain}/{self.record_id}")
+
+    def __setattr__(self, name, value):
+        raise AttributeError("records are read-only; load the config again to change them")
+
+    def __getitem__(self, field):
+        if field not in KEYS:
+            raise KeyError(field)
+        return getattr(self, field)
+
+    def __iter__(self):
+        return iter(KEYS)
+
+    def __len__(self):
+        return len(KEYS)
+
+    def __repr__(self):
+        return f"Record({self.record_name}.{self.domain} {self.record_type.upper()} {self.record_id})"
+
+
+def typed_settings(settings, where='DEFAULT', errors=None):
+    # settings dict with every key present and converted to its type
+    errors = [] if errors is None else errors
+    merged = {**{field: '' for field, _ in FIELDS}, **DEFAULTS, **settings}
+    return {field: _convert(field, merged[field], where, errors) for field in KEYS}
+
+def make_records(sections):
+    # sections: (name, settings dict) pairs; all problems are reported at once
+    errors = []
+    records = []
+    owners = {}  # record key -> section, records are told apart by their key
+    for where, settings in sections:
+        settings = typed_settings(settings, where, errors)
+        for field in ('api_key', 'domain'):
+            if not settings[field]:
+                errors.append(f"[{where}] {KEYS[field]} is missing")
+        if not settings['record_id'] and not settings['record_id6']:
+            errors.append(f"[{where}] RecordID is missing")
+        if settings['record_type'].lower() not in RECORD_TYPES:
+            errors.append(f"[{where}] RecordType: {settings['record_type']!r} is not A or AAAA")
+        for record in dual_stack(settings):
+            key = f"{record['domain']}/{record['record_id']}"
+            if key in owners:
+                errors.append(f"[{where}] RecordID {record['record_id']} is already used by [{owners[key]}]")
+            owners.setdefault(key, where)
+            records.append(record)
+    if errors:
+        raise ConfigError(errors)
+    return [Record(settings) for settings in records]
+
+
+def _from_keys(values):
+    # config file keys (ApiKey, RecordID, ...) to settings fields
+    fields = {key.lower(): field for field, key in KEYS.items()}
+    settings = {}
+    for key, value in values.items():
+        field = fields.get(str(key).lower())
+        if field is not None:
+            settings[field] = value
+    return settings
+
+def _read_ini(path):
+    # ConfigParser.read() skips missing files, which would turn a mistyped
+    # path into "RecordID is missing"
+    if not os.path.isfile(path):
+        raise ConfigError([f"{path}: no such config file"])
+    # No interpolation: a Token or ApiKey may well contain a "%"
+    config = configparser.ConfigParser(interpolation=None)
+    try:
+        config.read(path)
+    except configparser.Error as e:
+        raise ConfigError([f"{path}: {e}"])
+    defaults = _from_keys(config['DEFAULT'])
+    sections = [(name, _from_keys(config[name])) for name in config.sections()]
+    return defaults, sections
+
+def _read_structured(path):
+    # TOML or JSON: top-level keys are the shared defaults, "records" holds
+    # one table per record, either named ({"home": {...}}) or as a list.
+    if path.endswith('.toml') and tomllib is None:
+        raise ConfigError([f"{path}: TOML configs need Python 3.11 or newer"])
+    try:
+        if path.endswith('.toml'):
+            with open(path, 'rb') as f:
+                data = tomllib.load(f)
+        else:
+            with open(path) as f:
+                data = json.load(f)
+    except (OSError, ValueError) as e:
+        raise ConfigError([f"{path}: {e}"])
+    if not isinstance(data, dict):
+        raise ConfigError([f"{path}: expected a table of settings"])
+    tables = data.get('records') or {}
+    if isinstance(tables, list):
+        tables = {f"records[{index}]": table for index, table in enumerate(tables)}
+    if not isinstance(tables, dict) or not all(isinstance(table, dict) for table in tables.values()):
+        raise ConfigError([f"{path}: records must be tables"])
+    defaults = _from_keys({key: value for key, value in data.items() if key != 'records'})
+    return defaults, [(name, {**defaults, **_from_keys(table)}) for name, table in tables.items()]
+
+# Loads config.ini, config.toml or config.json and returns the shared
+# settings plus the validated records. Raises ConfigError listing every
+# problem found, so front ends can report them before starting any work.
+def load_model(path=CONFIG_PATH):
+    if os.path.splitext(path)[1] in ('.toml', '.json'):
+        defaults, sections = _read_structured(path)
+    else:
+        defaults, sections = _read_ini(path)
+    errors = []
+    settings = typed_settings(defaults, 'DEFAULT', errors)
+    if not errors:
+        # An empty Resolvers uses every backend, as configure_resolver() does
+        available = default_backends()
+        backends = [name for name in parse_list(settings['resolvers']) if name in available] or available
+        if settings['resolver_quorum'] > len(backends):
+            errors.append(f"[DEFAULT] ResolverQuorum: {settings['resolver_quorum']} is more than the "
+                          f"{len(backends)} configured resolver(s)")
+    if errors:
+        raise ConfigError(errors)
+    # A file without record sections is the classic single-record config
+    return settings, make_records(sections or [('DEFAULT', defaults)])
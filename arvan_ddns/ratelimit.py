@@ -0,0 +1,85 @@
+import threading
+import time
+
+
+RATE = 10  # requests per second per API key, 0 disables the limit
+BURST = 20
+
+
+# Token bucket shared by every record using the same API key. Writes jump
+# the queue: while a PUT is waiting for a token, reads are held back.
+class RateLimiter:
+    def __init__(self, rate=RATE, burst=BURST):
+        self.rate = rate
+        self.burst = max(burst, 1)
+        self.tokens = float(self.burst)
+        self._updated = time.monotonic()
+        self._writers = 0
+        self._cond = threading.Condition()
+        self._stats = {kind: {'requests': 0, 'waited': 0, 'wait_seconds': 0.0, 'max_wait': 0.0}
+                       for kind in ('read', 'write')}
+
+    def _refill(self):
+        now = time.monotonic()
+        self.tokens = min(self.burst, self.tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def acquire(self, write=False):
+        if self.rate <= 0:
+            return 0.0
+        started = time.monotonic()
+        with self._cond:
+            if write:
+                self._writers += 1
+            try:
+                while True:
+                    self._refill()
+                    blocked = not write and self._writers > 0
+                    if self.tokens >= 1 and not blocked:
+                        self.tokens -= 1
+                        break
+                    # Sleep until the next token is due; a reader held back by
+                    # a writer is woken when that writer is done.
+                    self._cond.wait(None if blocked and self.tokens >= 1 else (1 - self.tokens) / self.rate)
+            finally:
+                if write:
+                    self._writers -= 1
+                    self._cond.notify_all()
+            waited = time.monotonic() - started
+            stats = self._stats['write' if write else 'read']
+            stats['requests'] += 1
+            stats['wait_seconds'] += waited
+            stats['max_wait'] = max(stats['max_wait'], waited)
+            if waited > 0.001:
+                stats['waited'] += 1
+        return waited
+
+    def stats(self):
+        with self._cond:
+            return {kind: dict(stats) for kind, stats in self._stats.items()}
+
+
+_limiters = {}
+_settings = {'rate': RATE, 'burst': BURST}
+_lock = threading.Lock()
+
+
+def configure_rate_limit(rate=RATE, burst=BURST):
+    with _lock:
+        _settings.update(rate=rate, burst=burst)
+        for limiter in _limiters.values():
+            limiter.rate = rate
+            limiter.burst = max(burst, 1)
+
+def get_rate_limiter(api_key):
+    with _lock:
+        limiter = _limiters.get(api_key)
+        if limiter is None:
+            limiter = _limiters[api_key] = RateLimiter(_settings['rate'], _settings['burst'])
+        return limiter
+
+def rate_limit_stats():
+    # Keyed by position rather than by API key so secrets never end up in logs
+    with _lock:
+        limiters = list(_limiters.values())
+    return {f"account{index}": limiter.stats() for index, limiter in enumerate(limiters, 1)}
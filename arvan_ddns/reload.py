@@ -0,0 +1,155 @@
+import ctypes
+import ctypes.util
+import os
+import select
+import struct
+import sys
+import threading
+
+from .model import load_model
+
+
+# inotify constants from <sys/inotify.h>
+IN_CLOSE_WRITE = 0x8
+IN_MOVED_TO = 0x80
+IN_CLOEXEC = 0o2000000
+
+INOTIFY_EVENT = struct.Struct('=iIII')
+
+POLL_INTERVAL = 5  # seconds, fallback when inotify is not available
+SETTLE = 0.5  # seconds; editors save in several steps, reload once they are done
+
+
+def _inotify(path):
+    # Watches the config's directory rather than the file, so editors that
+    # save by renaming a temporary file over it are noticed too.
+    if not sys.platform.startswith('linux'):
+        return None
+    try:
+        libc = ctypes.CDLL(ctypes.util.find_library('c') or 'libc.so.6', use_errno=True)
+        fd = libc.inotify_init1(IN_CLOEXEC)
+    except (OSError, AttributeError):
+        return None
+    if fd < 0:
+        return None
+    directory = os.path.dirname(os.path.abspath(path))
+    if libc.inotify_add_watch(fd, os.fsencode(directory), IN_CLOSE_WRITE | IN_MOVED_TO) < 0:
+        os.close(fd)
+        return None
+    return fd
+
+def _event_names(data):
+    offset = 0
+    while offset + INOTIFY_EVENT.size <= len(data):
+        length = INOTIFY_EVENT.unpack_from(data, offset)[3]
+        start = offset + INOTIFY_EVENT.size
+        yield os.fsdecode(data[start:start + length].rstrip(b'\0'))
+        offset = start + length
+
+def _signature(path):
+    try:
+        stat = os.stat(path)
+    except OSError:
+        return None
+    return stat.st_mtime_ns, stat.st_size, stat.st_ino
+
+
+# Reloads the config file whenever it is saved. Loading happens on the
+# watcher thread; the result waits in take() for the update loop, which
+# applies it between cycles. A config with errors is logged and skipped, so
+# the records loaded before keep running.
+class ConfigWatcher:
+    def __init__(self, path, log=None, load=load_model, poll_interval=POLL_INTERVAL):
+        self.path = path
+        self.log = log
+        self.load = load
+        self.poll_interval = poll_interval
+        self.mode = None
+        self._data = None
+        self._settings = None
+        self._pending = None
+        self._on_change = None
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = None
+
+    def start(self):
+        self._data = self._read()
+        try:
+            self._settings = self.load(self.path)[0]
+        except Exception:
+            pass  # The first valid save becomes the baseline
+        fd = _inotify(self.path)
+        self.mode = 'inotify' if fd is not None else 'poll'
+        target = self._watch_inotify if fd is not None else self._watch_poll
+        self._thread = threading.Thread(target=target, args=(fd,), daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+
+    def listen(self, callback):
+        # callback() runs on the watcher thread once a new config is waiting
+        self._on_change = callback
+
+    def take(self):
+        # (previous settings, settings, records) of the newest valid config,
+        # or None. previous is None when no valid config was loaded before.
+        with self._lock:
+            change, self._pending = self._pending, None
+            if change is None:
+                return None
+            previous, self._settings = self._settings, change[0]
+            return (previous,) + change
+
+    def _read(self):
+        try:
+            with open(self.path, 'rb') as f:
+                return f.read()
+        except OSError:
+            return None
+
+    def _reload(self):
+        data = self._read()
+        if data is None or data == self._data:
+            return  # Removed mid-save, or saved without changes
+        self._data = data
+        try:
+            settings, records = self.load(self.path)
+        except Exception as e:
+            # ConfigError, but also a file the INI parser chokes on; the
+            # watcher has to survive either to pick up the next save
+            if self.log is not None:
+                self.log(f"Error: {self.path} has errors, keeping the current config:\n{e}\n")
+            return
+        with self._lock:
+            self._pending = (settings, records)
+        if self._on_change is not None:
+            self._on_change()
+
+    def _watch_inotify(self, fd):
+        name = os.path.basename(self.path)
+        try:
+            while not self._stop.is_set():
+                if not select.select([fd], [], [], 1)[0]:
+                    continue
+                if name not in _event_names(os.read(fd, 65536)):
+                    continue
+                if self._stop.wait(SETTLE):
+                    break
+                while select.select([fd], [], [], 0)[0]:
+                    os.read(fd, 65536)  # The rest of the same save
+                self._reload()
+        except OSError:
+            pass
+        finally:
+            os.close(fd)
+
+    def _watch_poll(self, fd=None):
+        known = _signature(self.path)
+        while not self._stop.wait(self.poll_interval):
+            current = _signature(self.path)
+            if current != known:
+                known = current
+                self._reload()
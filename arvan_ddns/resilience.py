@@ -0,0 +1,199 @@
+import email.utils
+import random
+import threading
+import time
+from urllib.parse import urlsplit
+
+import requests
+
+from . import metrics, tracing
+from .session import get_session, get_timeout
+
+
+RETRIES = 3
+BACKOFF_BASE = 0.5  # seconds
+BACKOFF_MAX = 30  # seconds
+REQUEST_BUDGET = 30  # seconds one call may spend across all attempts
+BREAKER_THRESHOLD = 5  # consecutive failures that open the circuit
+BREAKER_RESET = 60  # seconds before a half-open probe is let through
+
+RETRY_STATUSES = frozenset((500, 502, 503, 504))
+
+
+class CircuitOpenError(requests.RequestException):
+    pass
+
+
+# Stops calling an endpoint after `threshold` consecutive failures. After
+# `reset_timeout` one probe request is let through; its result closes the
+# circuit again or restarts the wait.
+class CircuitBreaker:
+    def __init__(self, threshold=BREAKER_THRESHOLD, reset_timeout=BREAKER_RESET):
+        self.threshold = threshold
+        self.reset_timeout = reset_timeout
+        self.failures = 0
+        self.opened_at = None
+        self._probing = False
+        self._lock = threading.Lock()
+
+    @property
+    def state(self):
+        if self.opened_at is None:
+            return 'closed'
+        return 'half-open' if time.monotonic() - self.opened_at >= self.reset_timeout else 'open'
+
+    def allow(self):
+        with self._lock:
+            state = self.state
+            if state == 'closed':
+                return True
+            if state == 'half-open' and not self._probing:
+                self._probing = True
+                return True
+            return False
+
+    def record_success(self):
+        with self._lock:
+            self.failures = 0
+            self.opened_at = None
+            self._probing = False
+
+    def record_failure(self):
+        with self._lock:
+            self.failures += 1
+            if self._probing or self.failures >= self.threshold:
+                self.opened_at = time.monotonic()
+            self._probing = False
+
+
+_settings = {
+    'retries': RETRIES,
+    'backoff_base': BACKOFF_BASE,
+    'backoff_max': BACKOFF_MAX,
+    'budget': REQUEST_BUDGET,
+    'threshold': BREAKER_THRESHOLD,
+    'reset_timeout': BREAKER_RESET,
+}
+_breakers = {}
+_lock = threading.Lock()
+
+
+def configure_resilience(retries=RETRIES, backoff_base=BACKOFF_BASE, backoff_max=BACKOFF_MAX, budget=REQUEST_BUDGET,
+                         threshold=BREAKER_THRESHOLD, reset_timeout=BREAKER_RESET):
+    with _lock:
+        _settings.update(retries=retries, backoff_base=backoff_base, backoff_max=backoff_max, budget=budget,
+                         threshold=threshold, reset_timeout=reset_timeout)
+        _breakers.clear()
+
+def endpoint_key(method, url):
+    parts = urlsplit(url)
+    return f"{method} {parts.scheme}://{parts.netloc}"
+
+def get_breaker(key):
+    with _lock:
+        breaker = _breakers.get(key)
+        if breaker is None:
+            breaker = _breakers[key] = CircuitBreaker(_settings['threshold'], _settings['reset_timeout'])
+        return breaker
+
+def breaker_states():
+    with _lock:
+        return {key: breaker.state for key, breaker in _breakers.items()}
+
+def _retry_after(response):
+    value = response.headers.get('Retry-After')
+    if not value:
+        return None
+    try:
+        return max(float(value), 0.0)
+    except ValueError:
+        pass
+    try:
+        return max(email.utils.parsedate_to_datetime(value).timestamp() - time.time(), 0.0)
+    except (TypeError, ValueError):
+        return None
+
+def _backoff(attempt):
+    # Full jitter: a random delay up to the exponential cap
+    return random.uniform(0, min(_settings['backoff_max'], _settings['backoff_base'] * 2 ** attempt))
+
+def _capped_timeout(timeout, remaining):
+    # No single wait (connect, or each read) may outlast the budget left
+    if isinstance(timeout, tuple):
+        return tuple(remaining if part is None else min(part, remaining) for part in timeout)
+    return remaining if timeout is None else min(timeout, remaining)
+
+# Sends one API call with (connect, read) timeouts, retrying 5xx answers and
+# connection errors with jittered exponential backoff and honouring
+# Retry-After on 429. The whole call never takes longer than the request
+# budget: each attempt's timeouts are capped at the time left, and no attempt
+# starts once it is spent. An open circuit fails fast with CircuitOpenError.
+# Every attempt takes a token from `limiter` when one is given.
+def request(method, url, retries=None, limiter=None, endpoint=None, **kwargs):
+    timeout = kwargs.pop('timeout', get_timeout())
+    retries = _settings['retries'] if retries is None else retries
+    key = endpoint_key(method, url)
+    endpoint = endpoint or key
+    breaker = get_breaker(key)
+    deadline = time.monotonic() + _settings['budget']
+    attempt = 0
+    response = error = None
+    while True:
+        if attempt > 0 and time.monotonic() >= deadline:
+            if response is not None:
+                return response
+            raise error
+        if not breaker.allow():
+            if attempt == 0:
+                raise CircuitOpenError(f"circuit open for {key}")
+            # The circuit opened while retrying: report the last outcome
+            if response is not None:
+                return response
+            raise error
+        if limiter is not None:
+            with tracing.span('rate_limit'):
+                limiter.acquire(write=method != 'GET')
+        started = time.monotonic()
+        # Waiting for the limiter may have used up the rest; the short timeout
+        # then still ends a half-open probe with a recorded failure
+        remaining = max(deadline - started, 0.01)
+        try:
+            with tracing.span('request', endpoint=endpoint, method=method, attempt=attempt):
+                response = get_session().request(method, url, timeout=_capped_timeout(timeout, remaining), **kwargs)
+        except (requests.ConnectionError, requests.Timeout) as e:
+            metrics.request_duration.observe(time.monotonic() - started, endpoint)
+            metrics.request_failures.inc(endpoint, 'timeout' if isinstance(e, requests.Timeout) else 'error')
+            breaker.record_failure()
+            error, response = e, None
+        except requests.RequestException:
+            # Not retried, but it still counts against the endpoint and ends
+            # a half-open probe, which would otherwise block it for good
+            metrics.request_duration.observe(time.monotonic() - started, endpoint)
+            metrics.request_failures.inc(endpoint, 'error')
+            breaker.record_failure()
+            raise
+        else:
+            metrics.request_duration.observe(time.monotonic() - started, endpoint)
+            if response.status_code >= 400:
+                metrics.request_failures.inc(endpoint, str(response.status_code))
+            if response.status_code in RETRY_STATUSES:
+                breaker.record_failure()
+            else:
+                breaker.record_success()
+                if response.status_code != 429:
+                    return response
+            error = None
+
+        if attempt >= retries:
+            if response is not None:
+                return response
+            raise error
+        delay = _retry_after(response) if response is not None and response.status_code == 429 else None
+        if delay is None:
+            delay = _backoff(attempt)
+        if time.monotonic() + delay >= deadline:
+            if response is not None:
+                return response
+            raise error
+        time.sleep(delay)
+        attempt += 1
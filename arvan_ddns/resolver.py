@@ -0,0 +1,268 @@
+import ipaddress
+import random
+import socket
+import struct
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+
+import requests
+
+from . import metrics, tracing
+from .resilience import request
+from .session import get_timeout
+from .watcher import has_route, local_addresses
+
+
+RESOLVER_TTL = 30  # seconds a resolved address is reused
+RACE_WIDTH = 3  # backends queried in parallel before falling back to the rest
+EWMA_WEIGHT = 0.3
+
+FAMILIES = {'a': 4, 'aaaa': 6}
+SOCKET_FAMILIES = {'a': socket.AF_INET, 'aaaa': socket.AF_INET6}
+
+
+def _valid_ip(value, family):
+    try:
+        address = ipaddress.ip_address(value.strip())
+    except (ValueError, AttributeError):
+        return None
+    return str(address) if address.version == FAMILIES[family] else None
+
+
+# Backends: each one answers resolve(family) with an address string or raises.
+class HttpEchoBackend:
+    def __init__(self, name, urls):
+        self.name = name
+        self.urls = urls  # family -> URL returning the caller's address as text
+
+    def supports(self, family):
+        return family in self.urls
+
+    def resolve(self, family):
+        # No retries here: the racing resolver already falls back to other backends
+        response = request('GET', self.urls[family], retries=0, endpoint=self.name)
+        response.raise_for_status()
+        return response.text
+
+
+class DnsBackend:
+    # Asks a resolver that answers a magic name with the querying address,
+    # e.g. OpenDNS's myip.opendns.com.
+    def __init__(self, name, qname, servers):
+        self.name = name
+        self.qname = qname
+        self.servers = servers  # family -> (host, port)
+
+    def supports(self, family):
+        return family in self.servers
+
+    def _query(self, family):
+        qtype = 1 if family == 'a' else 28
+        query_id = random.getrandbits(16)
+        header = struct.pack('!HHHHHH', query_id, 0x0100, 1, 0, 0, 0)
+        question = b''.join(bytes([len(label)]) + label.encode() for label in self.qname.split('.'))
+        return query_id, qtype, header + question + b'\x00' + struct.pack('!HH', qtype, 1)
+
+    def resolve(self, family):
+        query_id, qtype, packet = self._query(family)
+        host, port = self.servers[family]
+        sock_family = socket.AF_INET if ipaddress.ip_address(host).version == 4 else socket.AF_INET6
+        started = time.monotonic()
+        deadline = started + get_timeout()[1]
+        try:
+            with socket.socket(sock_family, socket.SOCK_DGRAM) as sock:
+                sock.sendto(packet, (host, port))
+                while True:
+                    # An unconnected socket takes datagrams from anyone; only
+                    # the queried server's answer counts
+                    sock.settimeout(max(deadline - time.monotonic(), 0.001))
+                    data, sender = sock.recvfrom(512)
+                    if ipaddress.ip_address(sender[0]) == ipaddress.ip_address(host) and sender[1] == port:
+                        break
+        except OSError:
+            metrics.request_failures.inc(self.name, 'timeout')
+            raise
+        finally:
+            metrics.request_duration.observe(time.monotonic() - started, self.name)
+        return self._parse(data, query_id, qtype)
+
+    def _parse(self, data, query_id, qtype):
+        try:
+            return self._parse_answer(data, query_id, qtype)
+        except (struct.error, IndexError):
+            raise ValueError("truncated DNS response")
+
+    def _parse_answer(self, data, query_id, qtype):
+        answer_id, flags, questions, answers = struct.unpack_from('!HHHH', data)
+        if answer_id != query_id or flags & 0x000f:
+            raise ValueError("bad DNS response")
+        offset = 12
+        for _ in range(questions):
+            offset = self._skip_name(data, offset) + 4
+        for _ in range(answers):
+            offset = self._skip_name(data, offset)
+            rtype, _, _, length = struct.unpack_from('!HHIH', data, offset)
+            offset += 10
+            if rtype == qtype:
+                return str(ipaddress.ip_address(data[offset:offset + length]))
+            offset += length
+        raise ValueError("no address in DNS response")
+
+    @staticmethod
+    def _skip_name(data, offset):
+        while True:
+            length = data[offset]
+            if length & 0xc0 == 0xc0:
+                return offset + 2
+            if length == 0:
+                return offset + 1
+            offset += length + 1
+
+
+class LocalInterfaceBackend:
+    # Only useful on hosts that own their public address (VPS, bridged modem)
+    name = 'local'
+
+    def supports(self, family):
+        return True
+
+    def resolve(self, family):
+        for address in local_addresses():
+            ip = ipaddress.ip_address(address)
+            if ip.version == FAMILIES[family] and ip.is_global:
+                return address
+        raise LookupError("no global address on local interfaces")
+
+
+def default_backends():
+    from . import api
+    return {
+        'ipify': HttpEchoBackend('ipify', {'a': api.IP_SERVICE_URL, 'aaaa': api.IP6_SERVICE_URL}),
+        'icanhazip': HttpEchoBackend('icanhazip', {'a': 'https://ipv4.icanhazip.com', 'aaaa': 'https://ipv6.icanhazip.com'}),
+        'opendns': DnsBackend('opendns', 'myip.opendns.com', {'a': ('208.67.222.222', 53), 'aaaa': ('2620:119:35::35', 53)}),
+        'local': LocalInterfaceBackend(),
+    }
+
+
+# Races the best few backends, takes the first valid answer (or the first
+# answer `quorum` backends agree on) and keeps it for `ttl` seconds.
+# Latency and failures are tracked per backend so slow or broken ones sink
+# to the fallback end of the chain.
+class Resolver:
+    def __init__(self, backends, ttl=RESOLVER_TTL, quorum=1, race=RACE_WIDTH):
+        self.backends = list(backends)
+        self.ttl = ttl
+        self.quorum = max(quorum, 1)
+        self.race = max(race, 1)
+        self._stats = {backend.name: {'latency': None, 'successes': 0, 'failures': 0} for backend in self.backends}
+        self._cache = {}
+        self._unrouted = set()
+        self._lock = threading.Lock()
+        # Room for every backend of both families, so A and AAAA races don't queue
+        self._executor = ThreadPoolExecutor(max_workers=max(len(self.backends), 1) * len(FAMILIES),
+                                            thread_name_prefix='resolver')
+
+    def _score(self, backend):
+        stats = self._stats[backend.name]
+        calls = stats['successes'] + stats['failures']
+        failure_rate = stats['failures'] / calls if calls else 0.0
+        latency = stats['latency'] if stats['latency'] is not None else 0.0
+        return latency * (1 + 4 * failure_rate) + failure_rate
+
+    def _call(self, backend, family):
+        started = time.monotonic()
+        try:
+            with tracing.span('backend', backend=backend.name, family=family):
+                ip = _valid_ip(backend.resolve(family), family)
+        except (requests.RequestException, OSError, ValueError, LookupError, struct.error, IndexError):
+            ip = None
+        elapsed = time.monotonic() - started
+        with self._lock:
+            stats = self._stats[backend.name]
+            if ip is None:
+                stats['failures'] += 1
+            else:
+                stats['successes'] += 1
+                previous = stats['latency']
+                stats['latency'] = elapsed if previous is None else previous + EWMA_WEIGHT * (elapsed - previous)
+        return ip
+
+    def _race(self, backends, family, votes):
+        # votes carries over from the primary race into the fallback one, so
+        # answers from both count towards the quorum
+        pending = {self._executor.submit(tracing.bind(self._call), backend, family) for backend in backends}
+        while pending:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                ip = future.result()
+                if ip is None:
+                    continue
+                votes[ip] = votes.get(ip, 0) + 1
+                if votes[ip] >= self.quorum:
+                    return ip  # Stragglers keep running and still update their stats
+        return None
+
+    def resolve(self, family='a', log=None):
+        now = time.monotonic()
+        with self._lock:
+            cached = self._cache.get(family)
+            if cached is not None and cached[1] > now:
+                return cached[0]
+            candidates = sorted((b for b in self.backends if b.supports(family)), key=self._score)
+
+        if not self._routed(family, log):
+            return None
+        votes = {}
+        ip = self._race(candidates[:self.race], family, votes)
+        if ip is None and candidates[self.race:]:
+            ip = self._race(candidates[self.race:], family, votes)
+        if ip is None:
+            if log is not None:
+                log(f"Error: Failed to get public IP from {', '.join(b.name for b in candidates) or 'any resolver'}\n")
+            return None
+        with self._lock:
+            self._cache[family] = (ip, time.monotonic() + self.ttl)
+        return ip
+
+    def _routed(self, family, log):
+        routed = has_route(SOCKET_FAMILIES[family])
+        with self._lock:
+            changed = routed == (family in self._unrouted)
+            if routed:
+                self._unrouted.discard(family)
+            else:
+                self._unrouted.add(family)
+        # Only log transitions, not every skipped lookup
+        if changed and log is not None:
+            if routed:
+                log(f"Info: IPv{FAMILIES[family]} route available again, resuming {family.upper()} lookups.\n")
+            else:
+                log(f"Info: No IPv{FAMILIES[family]} route, skipping {family.upper()} lookups until one appears.\n")
+        return routed
+
+    def invalidate(self):
+        with self._lock:
+            self._cache.clear()
+
+    def stats(self):
+        with self._lock:
+            return {name: dict(stats) for name, stats in self._stats.items()}
+
+
+_resolver = None
+_resolver_lock = threading.Lock()
+
+
+def configure_resolver(names=None, ttl=RESOLVER_TTL, quorum=1, race=RACE_WIDTH):
+    global _resolver
+    available = default_backends()
+    backends = [available[name] for name in (names or available) if name in available]
+    with _resolver_lock:
+        _resolver = Resolver(backends, ttl=ttl, quorum=quorum, race=race)
+    return _resolver
+
+def get_resolver():
+    if _resolver is None:
+        configure_resolver()
+    return _resolver
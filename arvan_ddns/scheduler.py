@@ -0,0 +1,114 @@
+import heapq
+import itertools
+import threading
+import time
+
+
+BATCH_WINDOW = 1.0  # seconds; jobs due this close together run in one cycle
+
+
+# Deadline scheduler on the monotonic clock. wait() sleeps until the
+# earliest job is due, so an idle updater wakes once per interval instead of
+# once per second. Setting wake_event interrupts the sleep immediately, both
+# for stopping and for address changes.
+class Scheduler:
+    def __init__(self, wake_event=None):
+        self.wake_event = wake_event if wake_event is not None else threading.Event()
+        self._heap = []
+        self._intervals = {}
+        self._deadlines = {}
+        self._counter = itertools.count()
+        self._interrupted = False
+        self._triggered = False
+        self._lock = threading.Lock()
+
+    def _push(self, key, deadline):
+        self._deadlines[key] = deadline
+        heapq.heappush(self._heap, (deadline, next(self._counter), key))
+
+    def add(self, key, interval, delay=None):
+        with self._lock:
+            self._intervals[key] = interval
+            self._push(key, time.monotonic() + (interval if delay is None else delay))
+
+    def remove(self, key):
+        # Heap entries of removed keys are dropped lazily when they surface
+        with self._lock:
+            self._intervals.pop(key, None)
+            self._deadlines.pop(key, None)
+
+    def reschedule(self, key, interval):
+        with self._lock:
+            if key not in self._intervals:
+                return
+            self._intervals[key] = interval
+            self._push(key, time.monotonic() + interval)
+
+    def run_all_now(self):
+        with self._lock:
+            now = time.monotonic()
+            for key in self._intervals:
+                self._push(key, now)
+
+    def interrupt(self):
+        # Wakes wait() without making every job due, e.g. after a reload
+        with self._lock:
+            self._interrupted = True
+        self.wake_event.set()
+
+    def trigger(self):
+        # Makes every job due at once, e.g. after a local address change.
+        # Kept apart from interrupt() so a reload arriving at the same time
+        # can't swallow it.
+        with self._lock:
+            self._triggered = True
+        self.wake_event.set()
+
+    def keys(self):
+        with self._lock:
+            return list(self._intervals)
+
+    def next_deadline(self):
+        with self._lock:
+            self._discard_stale()
+            return self._heap[0][0] if self._heap else None
+
+    def _discard_stale(self):
+        while self._heap and self._deadlines.get(self._heap[0][2]) != self._heap[0][0]:
+            heapq.heappop(self._heap)
+
+    def _pop_due(self, now):
+        due = []
+        self._discard_stale()
+        while self._heap and self._heap[0][0] <= now + BATCH_WINDOW:
+            _, _, key = heapq.heappop(self._heap)
+            del self._deadlines[key]
+            due.append(key)
+            self._discard_stale()
+        for key in due:
+            self._push(key, now + self._intervals[key])
+        return due
+
+    def wait(self, stop_event):
+        # Returns (due keys, triggered), or ([], False) once stop_event is set
+        # or interrupt() alone was called. trigger(), or a wake_event set by
+        # someone else, makes every job due at once and triggered True.
+        triggered = False
+        while not stop_event.is_set():
+            with self._lock:
+                now = time.monotonic()
+                due = self._pop_due(now)
+                if due:
+                    return due, triggered
+                timeout = self._heap[0][0] - now if self._heap else None
+            if self.wake_event.wait(timeout):
+                self.wake_event.clear()
+                with self._lock:
+                    interrupted, self._interrupted = self._interrupted, False
+                    woken, self._triggered = self._triggered, False
+                if interrupted and not woken:
+                    return [], False
+                if not stop_event.is_set():
+                    self.run_all_now()
+                    triggered = True
+        return [], False
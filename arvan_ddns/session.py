@@ -0,0 +1,159 @@
+import socket
+import threading
+import time
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.connection import HTTPConnection, HTTPSConnection
+from urllib3.connectionpool import HTTPConnectionPool, HTTPSConnectionPool
+from urllib3.exceptions import ConnectTimeoutError, NewConnectionError
+
+from . import tracing
+
+
+# Host pools kept alive at once. ArvanCloud plus the IPv4 and IPv6 endpoints
+# of every HTTP resolver already make five hosts; with fewer pools than hosts
+# the LRU evicts a pool on nearly every request and each call pays a new
+# TCP+TLS handshake.
+POOL_CONNECTIONS = 16
+POOL_MAXSIZE = 10
+TIMEOUT = 10  # seconds to wait for a response
+CONNECT_TIMEOUT = 3.05  # seconds to establish the TCP connection
+
+_session = None
+_pool_maxsize = POOL_MAXSIZE
+_timeout = (CONNECT_TIMEOUT, TIMEOUT)
+_lock = threading.Lock()
+_counts = {}  # "scheme://host:port" -> connections opened and requests sent
+_counts_lock = threading.Lock()
+
+
+def _count(host, kind):
+    with _counts_lock:
+        entry = _counts.setdefault(host, {'new': 0, 'requests': 0})
+        entry[kind] += 1
+
+
+# Connection classes that count opened connections and sent requests, and
+# report DNS, TCP connect and TLS handshake as separate spans while tracing
+# is enabled; otherwise they behave as stock.
+class _TracedConnectionMixin:
+    _stats_scheme = 'http'
+
+    def _stats_key(self):
+        return f"{self._stats_scheme}://{self.host}:{self.port}"
+
+    def _new_conn(self):
+        key = self._stats_key()
+        sock = self._traced_new_conn() if tracing.enabled() else super()._new_conn()
+        _count(key, 'new')
+        return sock
+
+    def request(self, *args, **kwargs):
+        _count(self._stats_key(), 'requests')
+        return super().request(*args, **kwargs)
+
+    def _traced_new_conn(self):
+        host = self.host
+        with tracing.span('dns', host=host):
+            try:
+                addresses = socket.getaddrinfo(self._dns_host, self.port, type=socket.SOCK_STREAM)
+            except OSError:
+                addresses = []
+        # Connect to the addresses just resolved, in order, so the lookup is
+        # not repeated inside the connect span. SNI and certificate checks
+        # still use self.host.
+        dns_host = self._dns_host
+        error = None
+        try:
+            for address in [info[4][0] for info in addresses] or [dns_host]:
+                self._dns_host = address
+                try:
+                    with tracing.span('connect', host=host, address=address):
+                        sock = super()._new_conn()
+                except (OSError, NewConnectionError, ConnectTimeoutError) as e:
+                    # urllib3 wraps socket errors in its own types; like its
+                    # create_connection(), move on to the next address
+                    error = e
+                    continue
+                self._tcp_connected = time.perf_counter()
+                return sock
+        finally:
+            self._dns_host = dns_host
+        raise error
+
+
+class TracedHTTPConnection(_TracedConnectionMixin, HTTPConnection):
+    pass
+
+
+class TracedHTTPSConnection(_TracedConnectionMixin, HTTPSConnection):
+    _stats_scheme = 'https'
+
+    def connect(self):
+        self._tcp_connected = None
+        super().connect()
+        if self._tcp_connected is not None:
+            tracing.record('tls', self._tcp_connected, time.perf_counter(), host=self.host)
+
+
+class TracedHTTPConnectionPool(HTTPConnectionPool):
+    ConnectionCls = TracedHTTPConnection
+
+
+class TracedHTTPSConnectionPool(HTTPSConnectionPool):
+    ConnectionCls = TracedHTTPSConnection
+
+
+class TracedHTTPAdapter(HTTPAdapter):
+    def init_poolmanager(self, *args, **kwargs):
+        super().init_poolmanager(*args, **kwargs)
+        self.poolmanager.pool_classes_by_scheme = {
+            'http': TracedHTTPConnectionPool,
+            'https': TracedHTTPSConnectionPool,
+        }
+
+
+def _build_session(pool_maxsize):
+    session = requests.Session()
+    adapter = TracedHTTPAdapter(pool_connections=POOL_CONNECTIONS, pool_maxsize=pool_maxsize)
+    session.mount('https://', adapter)
+    session.mount('http://', adapter)
+    return session
+
+def configure_session(pool_maxsize=POOL_MAXSIZE, timeout=TIMEOUT, connect_timeout=CONNECT_TIMEOUT):
+    global _session, _pool_maxsize, _timeout
+    with _lock:
+        _timeout = (connect_timeout, timeout)
+        if _session is not None:
+            if pool_maxsize == _pool_maxsize:
+                return _session  # Keep the warm connections
+            _session.close()
+        _session = _build_session(pool_maxsize)
+        _pool_maxsize = pool_maxsize
+    return _session
+
+# (connect, read) tuple as accepted by requests
+def get_timeout():
+    return _timeout
+
+def get_session():
+    global _session
+    if _session is None:
+        with _lock:
+            if _session is None:
+                _session = _build_session(POOL_MAXSIZE)
+    return _session
+
+def connection_stats():
+    # Counted by the connection classes rather than read from the pools, so
+    # pools the LRU already evicted still count; anything beyond the opened
+    # connections went over a kept-alive one.
+    stats = {'new': 0, 'reused': 0, 'hosts': {}}
+    with _counts_lock:
+        for host, counts in _counts.items():
+            reused = max(counts['requests'] - counts['new'], 0)
+            stats['hosts'][host] = {'new': counts['new'], 'reused': reused}
+            stats['new'] += counts['new']
+            stats['reused'] += reused
+    return stats
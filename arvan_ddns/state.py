@@ -0,0 +1,97 @@
+import hashlib
+import json
+import os
+import threading
+import time
+
+from .api import build_record_payload
+
+
+STATE_FILE = 'ddns_state.json'
+
+
+def state_path(config_path):
+    return os.path.join(os.path.dirname(os.path.abspath(config_path)), STATE_FILE)
+
+def record_key(settings):
+    return f"{settings['domain']}/{settings['record_id'].strip()}"
+
+def fingerprint(settings, ip):
+    # Hash of the payload we would PUT, so a changed name, type or IP all
+    # invalidate the cached entry.
+    payload = build_record_payload(settings['record_name'], settings['record_type'], ip)
+    return hashlib.sha1(json.dumps(payload, sort_keys=True).encode()).hexdigest()[:16]
+
+
+# Last confirmed value of every record, persisted next to config.ini so a
+# steady-state cycle can skip the API read entirely.
+class StateCache:
+    def __init__(self, path):
+        self.path = path
+        self.records = {}
+        self.cadence = {}  # adaptive interval and IP change history, kept apart so forget() leaves it
+        self._lock = threading.Lock()
+        self._dirty = False
+
+    def load(self):
+        try:
+            with open(self.path) as f:
+                data = json.load(f)
+            self.records = data.get('records', {})
+            self.cadence = data.get('cadence', {})
+        except (OSError, ValueError, AttributeError):
+            self.records = {}
+            self.cadence = {}
+        return self
+
+    def save(self):
+        with self._lock:
+            if not self._dirty:
+                return
+            data = json.dumps({'records': self.records, 'cadence': self.cadence}, indent=2, sort_keys=True)
+            self._dirty = False
+        tmp_path = self.path + '.tmp'
+        with open(tmp_path, 'w') as f:
+            f.write(data)
+        os.replace(tmp_path, self.path)
+
+    def is_fresh(self, settings, ip, verify_every):
+        # True when the record was confirmed at this IP and the forced
+        # verification is not due yet; counts the skipped cycle.
+        if verify_every <= 1:
+            return False
+        with self._lock:
+            entry = self.records.get(record_key(settings))
+            if entry is None or entry['value'] != ip or entry['fingerprint'] != fingerprint(settings, ip):
+                return False
+            if entry['cycles_since_verify'] + 1 >= verify_every:
+                return False
+            entry['cycles_since_verify'] += 1
+            self._dirty = True
+            return True
+
+    def confirm(self, settings, ip, written=False):
+        now = time.time()
+        with self._lock:
+            entry = self.records.setdefault(record_key(settings), {'written_at': None})
+            entry['value'] = ip
+            entry['fingerprint'] = fingerprint(settings, ip)
+            entry['confirmed_at'] = now
+            entry['cycles_since_verify'] = 0
+            if written:
+                entry['written_at'] = now
+            self._dirty = True
+
+    def forget(self, settings):
+        with self._lock:
+            if self.records.pop(record_key(settings), None) is not None:
+                self._dirty = True
+
+    def get_cadence(self, settings):
+        with self._lock:
+            return dict(self.cadence.get(record_key(settings), {}))
+
+    def set_cadence(self, settings, entry):
+        with self._lock:
+            self.cadence[record_key(settings)] = entry
+            self._dirty = True
@@ -0,0 +1,202 @@
+import collections
+import contextvars
+import json
+import os
+import sys
+import threading
+import time
+
+
+MAX_TRACES = 20  # finished root spans kept for dumping
+PROFILE_INTERVAL = 0.01  # seconds between profiler samples
+
+_enabled = False
+_current = contextvars.ContextVar('arvan_ddns_span', default=None)
+_traces = collections.deque(maxlen=MAX_TRACES)
+_lock = threading.Lock()
+
+
+class Span:
+    __slots__ = ('name', 'attrs', 'start', 'end', 'thread', 'children')
+
+    def __init__(self, name, attrs, start=None):
+        self.name = name
+        self.attrs = attrs
+        self.start = time.perf_counter() if start is None else start
+        self.end = None
+        self.thread = threading.get_ident()
+        self.children = []
+
+    def to_dict(self):
+        return {
+            'name': self.name,
+            'attrs': self.attrs,
+            'start': self.start,
+            'duration': (self.end or self.start) - self.start,
+            'children': [child.to_dict() for child in self.children],
+        }
+
+
+def _finish(span, parent):
+    if parent is not None:
+        parent.children.append(span)
+    else:
+        with _lock:
+            _traces.append(span)
+
+
+class _SpanContext:
+    __slots__ = ('span', 'parent', 'token')
+
+    def __init__(self, name, attrs):
+        self.parent = _current.get()
+        self.span = Span(name, attrs)
+
+    def __enter__(self):
+        self.token = _current.set(self.span)
+        return self.span
+
+    def __exit__(self, exc_type, exc, tb):
+        self.span.end = time.perf_counter()
+        if exc_type is not None:
+            self.span.attrs['error'] = exc_type.__name__
+        _current.reset(self.token)
+        _finish(self.span, self.parent)
+        return False
+
+
+class _NoSpan:
+    __slots__ = ()
+
+    def __enter__(self):
+        return None
+
+    def __exit__(self, exc_type, exc, tb):
+        return False
+
+
+_NO_SPAN = _NoSpan()
+
+
+def enable(enabled=True):
+    global _enabled
+    _enabled = enabled
+
+def enabled():
+    return _enabled
+
+# Spans nest through a context variable; a span opened with no parent
+# becomes a trace of its own (one per reconcile cycle, UI drain, ...).
+def span(name, **attrs):
+    if not _enabled:
+        return _NO_SPAN
+    return _SpanContext(name, attrs)
+
+def record(name, start, end, **attrs):
+    # Adds an already measured span (perf_counter times) to the current one
+    if not _enabled:
+        return
+    finished = Span(name, attrs, start)
+    finished.end = end
+    _finish(finished, _current.get())
+
+def bind(func):
+    # Worker threads don't inherit context variables; run func in a copy of
+    # the caller's context so its spans land under the caller's span.
+    if not _enabled:
+        return func
+    context = contextvars.copy_context()
+    return lambda *args, **kwargs: context.run(func, *args, **kwargs)
+
+def traces():
+    with _lock:
+        return list(_traces)
+
+def dump_json(path):
+    _write(path, {'traces': [trace.to_dict() for trace in traces()]})
+
+def dump_chrome(path):
+    # Trace Event Format "complete" events, loadable in chrome://tracing and Perfetto
+    events = []
+
+    def walk(span):
+        events.append({
+            'name': span.name,
+            'ph': 'X',
+            'ts': round(span.start * 1e6, 1),
+            'dur': round(((span.end or span.start) - span.start) * 1e6, 1),
+            'pid': os.getpid(),
+            'tid': span.thread,
+            'args': span.attrs,
+        })
+        for child in span.children:
+            walk(child)
+
+    for trace in traces():
+        walk(trace)
+    _write(path, {'traceEvents': events, 'displayTimeUnit': 'ms'})
+
+def dump(path, fmt='chrome'):
+    (dump_chrome if fmt == 'chrome' else dump_json)(path)
+
+def _write(path, data):
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_path, 'w') as f:
+        json.dump(data, f, default=str)
+    os.replace(tmp_path, path)
+
+
+# Statistical profiler for long-running processes: samples every thread's
+# stack every `interval` seconds and writes collapsed stacks
+# ("frame;frame;frame count"), the input format of flamegraph.pl/speedscope.
+class SamplingProfiler:
+    def __init__(self, interval=PROFILE_INTERVAL):
+        self.interval = interval
+        self.samples = collections.Counter()
+        self._stop = threading.Event()
+        self._thread = None
+
+    @property
+    def running(self):
+        return self._thread is not None and self._thread.is_alive()
+
+    def start(self):
+        if not self.running:
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._run, name='sampling-profiler', daemon=True)
+            self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+    def toggle(self, path):
+        # Start sampling, or stop and write the collected stacks to path
+        if self.running:
+            self.stop()
+            self.dump(path)
+            return False
+        self.samples.clear()
+        self.start()
+        return True
+
+    def _run(self):
+        own = threading.get_ident()
+        while not self._stop.wait(self.interval):
+            for thread_id, frame in sys._current_frames().items():
+                if thread_id == own:
+                    continue
+                stack = []
+                while frame is not None:
+                    code = frame.f_code
+                    stack.append(f"{os.path.basename(code.co_filename)}:{code.co_name}")
+                    frame = frame.f_back
+                self.samples[';'.join(reversed(stack))] += 1
+
+    def dump(self, path):
+        with open(path, 'w') as f:
+            for stack, count in self.samples.most_common():
+                f.write(f"{stack} {count}\n")
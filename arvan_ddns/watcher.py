@@ -0,0 +1,132 @@
+import socket
+import struct
+import threading
+
+
+# rtnetlink constants from <linux/rtnetlink.h>
+RTMGRP_IPV4_IFADDR = 0x10
+RTMGRP_IPV6_IFADDR = 0x100
+RTM_NEWADDR = 20
+RTM_DELADDR = 21
+RT_SCOPE_LINK = 253
+
+NLMSG_HEADER = struct.Struct('=IHHII')
+IFADDRMSG = struct.Struct('=BBBBI')
+
+POLL_INTERVAL = 30  # seconds, fallback when netlink is not available
+
+# Well-known addresses used only to ask the kernel which source address it
+# would pick; connecting a UDP socket sends no packets.
+PROBE_ADDRESSES = ((socket.AF_INET, '192.0.2.1'), (socket.AF_INET6, '2001:db8::1'))
+
+
+def _netlink_socket():
+    if not hasattr(socket, 'AF_NETLINK'):
+        return None
+    try:
+        sock = socket.socket(socket.AF_NETLINK, socket.SOCK_RAW, socket.NETLINK_ROUTE)
+        sock.bind((0, RTMGRP_IPV4_IFADDR | RTMGRP_IPV6_IFADDR))
+    except OSError:
+        return None
+    return sock
+
+def _address_changed(data):
+    # True when the datagram holds a new/removed address with global scope
+    offset = 0
+    while offset + NLMSG_HEADER.size <= len(data):
+        length, msg_type = NLMSG_HEADER.unpack_from(data, offset)[:2]
+        if length < NLMSG_HEADER.size:
+            break
+        if msg_type in (RTM_NEWADDR, RTM_DELADDR):
+            scope = IFADDRMSG.unpack_from(data, offset + NLMSG_HEADER.size)[3]
+            if scope < RT_SCOPE_LINK:
+                return True
+        offset += (length + 3) & ~3
+    return False
+
+def has_route(family):
+    # Without a route the connect fails at once (ENETUNREACH), so hosts with
+    # no IPv6 connectivity can skip IPv6 lookups instead of waiting on them.
+    probe = dict(PROBE_ADDRESSES)[family]
+    try:
+        with socket.socket(family, socket.SOCK_DGRAM) as sock:
+            sock.connect((probe, 9))
+    except OSError:
+        return False
+    return True
+
+def local_addresses():
+    addresses = set()
+    for family, probe in PROBE_ADDRESSES:
+        try:
+            with socket.socket(family, socket.SOCK_DGRAM) as sock:
+                sock.connect((probe, 9))
+                addresses.add(sock.getsockname()[0])
+        except OSError:
+            pass
+    return addresses
+
+
+# Sets wake_event as soon as a local address changes so the engine can
+# reconcile right away; the regular interval stays as a backstop.
+class AddressWatcher:
+    def __init__(self, wake_event, log=None, poll_interval=POLL_INTERVAL):
+        self.wake_event = wake_event
+        self.log = log
+        self.poll_interval = poll_interval
+        self.mode = None
+        self._on_change = None
+        self._stop = threading.Event()
+        self._thread = None
+
+    def start(self):
+        sock = _netlink_socket()
+        self.mode = 'netlink' if sock is not None else 'poll'
+        target = self._watch_netlink if sock is not None else self._watch_poll
+        self._thread = threading.Thread(target=target, args=(sock,), daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+
+    def listen(self, callback):
+        # callback() replaces setting wake_event, e.g. Scheduler.trigger
+        self._on_change = callback
+
+    def _changed(self):
+        if self.log is not None:
+            self.log("Local address change detected, checking now.\n")
+        if self._on_change is not None:
+            self._on_change()
+        else:
+            self.wake_event.set()
+
+    def _watch_netlink(self, sock):
+        # RTM_NEWADDR also arrives for IPv6 lifetime refreshes on every router
+        # advertisement, so an event only counts when the source addresses
+        # the kernel would pick actually changed
+        known = local_addresses()
+        sock.settimeout(1)
+        with sock:
+            while not self._stop.is_set():
+                try:
+                    data = sock.recv(65536)
+                except socket.timeout:
+                    continue
+                except OSError:
+                    break
+                if not _address_changed(data):
+                    continue
+                current = local_addresses()
+                if current != known:
+                    known = current
+                    self._changed()
+
+    def _watch_poll(self, sock=None):
+        known = local_addresses()
+        while not self._stop.wait(self.poll_interval):
+            current = local_addresses()
+            if current != known:
+                known = current
+                self._changed()
@@ -0,0 +1,112 @@
+"""Throughput and latency of the reconcile cycle against local stand-ins.
+
+Starts the fake ArvanCloud API and IP echo service from fake_servers.py,
+runs the engine behind auto_update (run_cycle) for a number of cycles and
+prints one JSON document, so results can be compared between releases:
+
+    python benchmarks/cycle.py --records 200 --cycles 20 --latency 0.02 --drift 0.1
+"""
+import argparse
+import json
+import os
+import resource
+import statistics
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from arvan_ddns import (  # noqa: E402
+    api, configure, configure_resolver, connection_stats, load_config, make_records, run_cycle,
+)
+from fake_servers import add_record, arvan_server, ip_echo_server  # noqa: E402
+
+STALE_IP = '198.51.100.1'
+
+
+def percentile(values, fraction):
+    ordered = sorted(values)
+    return ordered[min(int(round(fraction * (len(ordered) - 1))), len(ordered) - 1)]
+
+def peak_rss_kib():
+    # ru_maxrss is KiB on Linux and bytes on macOS
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak // 1024 if sys.platform == 'darwin' else peak
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--records', type=int, default=100)
+    parser.add_argument('--domains', type=int, default=1)
+    parser.add_argument('--cycles', type=int, default=10)
+    parser.add_argument('--latency', type=float, default=0.0, help="seconds added to every fake API response")
+    parser.add_argument('--error-rate', type=float, default=0.0, help="fraction of API requests answered with 503")
+    parser.add_argument('--drift', type=float, default=0.0, help="fraction of records made stale before each cycle")
+    parser.add_argument('--mode', choices=('record', 'zone'), default='record')
+    parser.add_argument('--concurrency', type=int, default=8)
+    args = parser.parse_args()
+
+    ip_server = ip_echo_server()
+    arvan = arvan_server(args.latency, args.error_rate)
+    api.API_BASE = f"{arvan.url}/cdn/4.0"
+    api.IP_SERVICE_URL = f"{ip_server.url}/"
+
+    settings = load_config(os.devnull)
+    settings.update(api_key='apikey benchmark', record_type='a', interval='1', concurrency=str(args.concurrency),
+                    pool_size=str(max(args.concurrency, 10)), check_mode=args.mode, rate_limit='0',
+                    backoff_base='0.01')
+    configure(settings)
+    configure_resolver(['ipify'], ttl=0)
+
+    sections = []
+    for index in range(args.records):
+        domain = f"zone{index % args.domains}.example"
+        add_record(arvan, domain, f"rec{index}", f"host{index}", ip_server.ip)
+        sections.append((f"rec{index}", dict(settings, domain=domain, record_id=f"rec{index}",
+                                             record_name=f"host{index}")))
+    records = make_records(sections)
+
+    drifted = int(args.records * args.drift)
+    durations = []
+    requests_per_cycle = []
+    updated = 0
+    for cycle in range(args.cycles):
+        for index in range(cycle * drifted, cycle * drifted + drifted):
+            record = records[index % args.records]
+            arvan.records[(record['domain'], record['record_id'])]['value'] = [{'ip': STALE_IP}]
+        arvan.reset_counts()
+        ip_server.reset_counts()
+        report = run_cycle(records, lambda message: None)
+        durations.append(report['duration'])
+        updated += report['updated']
+        requests_per_cycle.append(arvan.total_requests() + ip_server.total_requests())
+
+    total = sum(durations)
+    result = {
+        'records': args.records,
+        'domains': args.domains,
+        'cycles': args.cycles,
+        'mode': args.mode,
+        'concurrency': args.concurrency,
+        'latency': args.latency,
+        'error_rate': args.error_rate,
+        'drift': args.drift,
+        'records_per_second': round(args.records * args.cycles / total, 1) if total else None,
+        'cycle_p50_seconds': round(statistics.median(durations), 4),
+        'cycle_p99_seconds': round(percentile(durations, 0.99), 4),
+        'requests_per_cycle': round(statistics.mean(requests_per_cycle), 1),
+        'updates': updated,
+        'connections': connection_stats(),
+        'peak_rss_kib': peak_rss_kib(),
+    }
+    connections = result.pop('connections')
+    result['connections_new'] = connections['new']
+    result['connections_reused'] = connections['reused']
+    print(json.dumps(result, indent=2))
+    arvan.stop()
+    ip_server.stop()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,139 @@
+"""Local stand-ins for the ArvanCloud DNS API and an IP echo service.
+
+Both are plain ThreadingHTTPServer instances speaking keep-alive HTTP/1.1,
+with configurable latency and error rate, so the engine can be measured
+without touching the real services.
+"""
+import json
+import random
+import threading
+import time
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from urllib.parse import parse_qs, urlsplit
+
+
+class _Server(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, handler, latency=0.0, error_rate=0.0):
+        super().__init__(('127.0.0.1', 0), handler)
+        self.latency = latency
+        self.error_rate = error_rate
+        self.counts = {}
+        self.lock = threading.Lock()
+
+    @property
+    def url(self):
+        return f"http://127.0.0.1:{self.server_port}"
+
+    def count(self, kind):
+        with self.lock:
+            self.counts[kind] = self.counts.get(kind, 0) + 1
+
+    def total_requests(self):
+        with self.lock:
+            return sum(self.counts.values())
+
+    def reset_counts(self):
+        with self.lock:
+            self.counts = {}
+
+    def start(self):
+        threading.Thread(target=self.serve_forever, daemon=True).start()
+        return self
+
+    def stop(self):
+        self.shutdown()
+        self.server_close()
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+    # Headers and body go out in separate writes; without TCP_NODELAY every
+    # keep-alive response would stall on the client's delayed ACK.
+    disable_nagle_algorithm = True
+
+    def log_message(self, *args):
+        pass
+
+    def _send(self, status, body, content_type='application/json'):
+        data = body if isinstance(body, bytes) else json.dumps(body).encode()
+        self.send_response(status)
+        self.send_header('Content-Type', content_type)
+        self.send_header('Content-Length', str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def _delay_or_fail(self):
+        # Returns True when this request was answered with an injected error
+        if self.server.latency:
+            time.sleep(self.server.latency)
+        if self.server.error_rate and random.random() < self.server.error_rate:
+            self.server.count('error')
+            self._send(503, {'message': 'injected failure'})
+            return True
+        return False
+
+
+class IpEchoHandler(_Handler):
+    def do_GET(self):
+        self.server.count('ip')
+        if not self._delay_or_fail():
+            self._send(200, self.server.ip.encode(), 'text/plain')
+
+
+class ArvanHandler(_Handler):
+    # /cdn/4.0/domains/{domain}/dns-records[/{record_id}]
+    def _route(self):
+        parts = urlsplit(self.path).path.strip('/').split('/')
+        if len(parts) < 5 or parts[:3] != ['cdn', '4.0', 'domains'] or parts[4] != 'dns-records':
+            return None, None
+        return parts[3], (parts[5] if len(parts) > 5 else None)
+
+    def do_GET(self):
+        domain, record_id = self._route()
+        if domain is None:
+            return self._send(404, {'message': 'not found'})
+        self.server.count('list' if record_id is None else 'get')
+        if self._delay_or_fail():
+            return
+        if record_id is not None:
+            record = self.server.records.get((domain, record_id))
+            return self._send(200, {'data': record}) if record else self._send(404, {'message': 'not found'})
+        query = parse_qs(urlsplit(self.path).query)
+        page = int(query.get('page', ['1'])[0])
+        per_page = int(query.get('per_page', ['25'])[0])
+        zone = [record for (zone_domain, _), record in self.server.records.items() if zone_domain == domain]
+        last_page = max((len(zone) + per_page - 1) // per_page, 1)
+        self._send(200, {'data': zone[(page - 1) * per_page:page * per_page],
+                         'meta': {'current_page': page, 'last_page': last_page, 'per_page': per_page,
+                                  'total': len(zone)}})
+
+    def do_PUT(self):
+        domain, record_id = self._route()
+        body = json.loads(self.rfile.read(int(self.headers.get('Content-Length', 0))) or b'{}')
+        if domain is None or record_id is None:
+            return self._send(404, {'message': 'not found'})
+        self.server.count('put')
+        if self._delay_or_fail():
+            return
+        record = self.server.records.get((domain, record_id))
+        if record is None:
+            return self._send(404, {'message': 'not found'})
+        record['value'] = body.get('value', record['value'])
+        self._send(200, {'data': record})
+
+
+def ip_echo_server(ip='203.0.113.7', latency=0.0, error_rate=0.0):
+    server = _Server(IpEchoHandler, latency, error_rate)
+    server.ip = ip
+    return server.start()
+
+def arvan_server(latency=0.0, error_rate=0.0):
+    server = _Server(ArvanHandler, latency, error_rate)
+    server.records = {}
+    return server.start()
+
+def add_record(server, domain, record_id, name, ip, record_type='a'):
+    server.records[(domain, record_id)] = {'id': record_id, 'name': name, 'type': record_type,
+                                           'value': [{'ip': ip}]}
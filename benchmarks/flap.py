@@ -0,0 +1,110 @@
+"""Writes and time-to-convergence on a flapping link.
+
+Replays a failover scenario against the fake ArvanCloud API on a simulated
+clock: the public IP is stable, then flips between the primary and backup
+link at random for a while, then settles on the backup. Every poll goes
+through the engine's change-confirmation stage (apply_addresses), so the
+debounce settings can be compared by how many PUTs they issue and how long
+the record lags behind the final address:
+
+    python benchmarks/flap.py --interval 60 --confirm-count 3 --min-write-interval 600
+"""
+import argparse
+import json
+import os
+import random
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from arvan_ddns import api, apply_addresses, configure, load_config, make_records, reset_change_gate  # noqa: E402
+from fake_servers import add_record, arvan_server  # noqa: E402
+
+PRIMARY_IP = '203.0.113.7'
+BACKUP_IP = '198.51.100.9'
+
+
+def timeline(args):
+    # (start second, ip) segments: stable, flapping, settled on the backup
+    rng = random.Random(args.seed)
+    segments = [(0, PRIMARY_IP)]
+    now = args.stable
+    ip = BACKUP_IP
+    while now < args.stable + args.flapping:
+        segments.append((now, ip))
+        now += rng.uniform(args.flap_min, args.flap_max)
+        ip = PRIMARY_IP if ip == BACKUP_IP else BACKUP_IP
+    segments.append((args.stable + args.flapping, BACKUP_IP))
+    return segments
+
+def ip_at(segments, second):
+    return [ip for start, ip in segments if start <= second][-1]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--interval', type=float, default=60, help="seconds between polls")
+    parser.add_argument('--stable', type=float, default=1200, help="seconds on the primary link before flapping")
+    parser.add_argument('--flapping', type=float, default=2400, help="seconds the link flaps")
+    parser.add_argument('--settled', type=float, default=3600, help="seconds on the backup link afterwards")
+    parser.add_argument('--flap-min', type=float, default=60)
+    parser.add_argument('--flap-max', type=float, default=300)
+    parser.add_argument('--seed', type=int, default=1)
+    parser.add_argument('--confirm-count', type=int, default=0)
+    parser.add_argument('--confirm-seconds', type=float, default=0)
+    parser.add_argument('--min-write-interval', type=float, default=0)
+    parser.add_argument('--write-burst', type=int, default=0)
+    parser.add_argument('--write-burst-window', type=float, default=3600)
+    args = parser.parse_args()
+
+    arvan = arvan_server()
+    api.API_BASE = f"{arvan.url}/cdn/4.0"
+    settings = load_config(os.devnull)
+    settings.update(api_key='apikey benchmark', domain='example.com', record_id='rec0', record_name='home',
+                    record_type='a', rate_limit='0', confirm_count=str(args.confirm_count),
+                    confirm_seconds=str(args.confirm_seconds), min_write_interval=str(args.min_write_interval),
+                    write_burst=str(args.write_burst), write_burst_window=str(args.write_burst_window))
+    configure(settings)
+    record, = make_records([('benchmark', settings)])
+    add_record(arvan, 'example.com', 'rec0', 'home', PRIMARY_IP)
+
+    clock = [0.0]
+    reset_change_gate(clock=lambda: clock[0])
+    segments = timeline(args)
+    end = args.stable + args.flapping + args.settled
+    stale_seconds = 0.0
+    converged_at = None
+    while clock[0] < end:
+        ip = ip_at(segments, clock[0])
+        apply_addresses([(record, ip)], lambda message: None)
+        value = arvan.records[('example.com', 'rec0')]['value'][0]['ip']
+        if value != ip:
+            stale_seconds += args.interval
+        # First poll from which the record holds the final address for good
+        if value != BACKUP_IP:
+            converged_at = None
+        elif converged_at is None:
+            converged_at = clock[0]
+        clock[0] += args.interval
+
+    changes = [start for (_, previous), (start, ip) in zip(segments, segments[1:]) if ip != previous]
+    result = {
+        'interval': args.interval,
+        'confirm_count': args.confirm_count,
+        'confirm_seconds': args.confirm_seconds,
+        'min_write_interval': args.min_write_interval,
+        'write_burst': args.write_burst,
+        'ip_changes': len(changes),
+        'writes': arvan.counts.get('put', 0),
+        'reads': arvan.counts.get('get', 0),
+        'stale_seconds': stale_seconds,
+        'convergence_seconds': None if converged_at is None else round(max(converged_at - changes[-1], 0), 1),
+    }
+    print(json.dumps(result, indent=2))
+    arvan.stop()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,73 @@
+"""Time-to-first-paint of the GUI while the IP service is slow.
+
+Runs ArvanDDNS.py against a local IP echo server that answers after
+--delay seconds and reports, as JSON, how long it took until the main
+window was mapped and until the IP label was filled in.
+
+    python benchmarks/startup.py --delay 3
+"""
+import argparse
+import json
+import os
+import runpy
+import sys
+import tempfile
+import time
+import tkinter as tk
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from arvan_ddns import api, configure_resolver  # noqa: E402
+from fake_servers import ip_echo_server  # noqa: E402
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--delay', type=float, default=3.0, help="seconds the IP service takes to answer")
+    parser.add_argument('--script', default='ArvanDDNS.py', help="front end to start")
+    args = parser.parse_args()
+
+    server = ip_echo_server(latency=args.delay)
+    api.IP_SERVICE_URL = f"{server.url}/"
+    configure_resolver(['ipify'])
+
+    result = {'script': args.script, 'ip_delay': args.delay}
+    started = time.perf_counter()
+    original_mainloop = tk.Misc.mainloop
+
+    def measured_mainloop(widget, n=0):
+        root = widget._root()
+
+        def on_map(event):
+            if event.widget is root and 'first_paint' not in result:
+                result['first_paint'] = time.perf_counter() - started
+
+        def shows_ip(widget):
+            if 'text' in widget.keys() and str(widget.cget('text')) == server.ip:
+                return True
+            return any(shows_ip(child) for child in widget.winfo_children())
+
+        def poll_ip():
+            if shows_ip(root):
+                result['ip_shown'] = time.perf_counter() - started
+                root.destroy()
+            else:
+                root.after(10, poll_ip)
+
+        root.bind('<Map>', on_map, add='+')
+        root.after(10, poll_ip)
+        root.after(int((args.delay + 10) * 1000), root.destroy)
+        original_mainloop(widget, n)
+
+    tk.Misc.mainloop = measured_mainloop
+    # Run from an empty directory so no config.ini is picked up
+    os.chdir(tempfile.mkdtemp())
+    runpy.run_path(os.path.join(ROOT, args.script), run_name='__main__')
+    server.stop()
+    print(json.dumps(result, indent=2))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,52 @@
+import os
+import sys
+
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.join(ROOT, 'benchmarks'))
+
+from arvan_ddns import api, configure, load_config, make_records, reset_change_gate  # noqa: E402
+from fake_servers import add_record, arvan_server, ip_echo_server  # noqa: E402
+
+PUBLIC_IP = '203.0.113.7'
+OLD_IP = '198.51.100.9'
+DOMAIN = 'example.com'
+
+
+# The local stand-ins from benchmarks/fake_servers.py in place of ArvanCloud
+# and ipify, with rate limiting off so request counts are all that matters.
+@pytest.fixture
+def servers(monkeypatch):
+    arvan = arvan_server()
+    echo = ip_echo_server(PUBLIC_IP)
+    monkeypatch.setattr(api, 'API_BASE', f"{arvan.url}/cdn/4.0")
+    monkeypatch.setattr(api, 'IP_SERVICE_URL', echo.url)
+    settings = load_config(os.devnull)
+    settings.update(rate_limit='0', resolvers='ipify', resolver_ttl='0')
+    configure(settings)
+    reset_change_gate()
+    yield arvan, echo
+    arvan.stop()
+    echo.stop()
+
+
+# make_records(count, ip, **settings) seeds count A records holding ip on the
+# stand-in and returns them as loaded Records
+@pytest.fixture
+def make_records_on(servers):
+    arvan, _ = servers
+
+    def make(count, ip, **overrides):
+        sections = []
+        for index in range(count):
+            record_id = f"rec{index}"
+            add_record(arvan, DOMAIN, record_id, f"host{index}", ip)
+            settings = load_config(os.devnull)
+            settings.update(api_key='apikey test', domain=DOMAIN, record_id=record_id, record_name=f"host{index}",
+                            record_type='A', rate_limit='0', **overrides)
+            sections.append((record_id, settings))
+        return make_records(sections)
+
+    return make
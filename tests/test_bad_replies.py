@@ -0,0 +1,41 @@
+from arvan_ddns import api, run_cycle
+from fake_servers import ArvanHandler
+
+from conftest import OLD_IP, PUBLIC_IP, DOMAIN
+
+
+def _log(message):
+    pass
+
+
+def _maintenance_page(monkeypatch, path_part):
+    # The stand-in answers 200 with an HTML page for requests matching path_part
+    do_get = ArvanHandler.do_GET
+
+    def do_GET(self):
+        if path_part in self.path:
+            self.server.count('maintenance')
+            return self._send(200, b'<html>maintenance</html>', 'text/html')
+        return do_get(self)
+
+    monkeypatch.setattr(ArvanHandler, 'do_GET', do_GET)
+
+
+def test_bad_record_body_fails_only_that_record(servers, make_records_on, monkeypatch):
+    arvan, _ = servers
+    records = make_records_on(3, OLD_IP)
+    _maintenance_page(monkeypatch, '/dns-records/rec1')
+    messages = []
+    report = run_cycle(records, messages.append)
+    assert report['results'] == {f"{DOMAIN}/rec0": 'updated', f"{DOMAIN}/rec1": 'failed',
+                                 f"{DOMAIN}/rec2": 'updated'}
+    assert any(message.startswith("Error: Unexpected reply") for message in messages)
+
+
+def test_bad_zone_listing_falls_back_to_gets(servers, make_records_on, monkeypatch):
+    arvan, _ = servers
+    records = make_records_on(3, PUBLIC_IP, check_mode='zone')
+    _maintenance_page(monkeypatch, '/dns-records?')
+    report = run_cycle(records, _log)
+    assert set(report['results'].values()) == {'unchanged'}
+    assert arvan.counts == {'maintenance': 1, 'get': 3}
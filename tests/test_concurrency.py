@@ -0,0 +1,48 @@
+import os
+import time
+
+from arvan_ddns import apply_addresses, load_config, make_records
+from fake_servers import add_record
+
+from conftest import DOMAIN, OLD_IP, PUBLIC_IP
+
+
+def _records(arvan, api_key, count, concurrency):
+    sections = []
+    for index in range(count):
+        record_id = f"{api_key.split()[-1]}{index}"
+        add_record(arvan, DOMAIN, record_id, record_id, PUBLIC_IP)
+        settings = load_config(os.devnull)
+        settings.update(api_key=api_key, domain=DOMAIN, record_id=record_id, record_name=record_id,
+                        record_type='A', rate_limit='0', concurrency=str(concurrency))
+        sections.append((record_id, settings))
+    return make_records(sections)
+
+
+def _timed(targets):
+    started = time.monotonic()
+    report = apply_addresses(targets, lambda message: None)
+    return report, time.monotonic() - started
+
+
+def test_accounts_do_not_queue_behind_each_other(servers):
+    arvan, _ = servers
+    arvan.latency = 0.05
+    first = _records(arvan, 'apikey a', 16, 4)
+    second = _records(arvan, 'apikey b', 16, 4)
+    report, alone = _timed([(record, PUBLIC_IP) for record in first])
+    assert set(report['results'].values()) == {'unchanged'}
+    report, together = _timed([(record, PUBLIC_IP) for record in first + second])
+    assert len(report['results']) == 32
+    # Each account runs its own 4 workers side by side: 16 / 4 reads of 50 ms
+    assert together < alone * 1.5
+
+
+def test_concurrency_is_capped_per_account(servers):
+    arvan, _ = servers
+    arvan.latency = 0.05
+    records = _records(arvan, 'apikey a', 8, 2)
+    report, elapsed = _timed([(record, OLD_IP) for record in records])
+    assert set(report['results'].values()) == {'updated'}
+    # 8 reads and 8 writes, at most 2 at a time
+    assert elapsed >= 8 * 0.05 * 2 / 2 * 0.9
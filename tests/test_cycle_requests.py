@@ -0,0 +1,55 @@
+from arvan_ddns import run_cycle, update_dns_record
+
+from conftest import OLD_IP, PUBLIC_IP, DOMAIN
+
+
+def _log(message):
+    pass
+
+
+def test_unchanged_cycle_reads_each_record_once(servers, make_records_on):
+    arvan, echo = servers
+    records = make_records_on(3, PUBLIC_IP)
+    report = run_cycle(records, _log)
+    assert report['updated'] == 0
+    assert echo.counts == {'ip': 1}
+    assert arvan.counts == {'get': 3}
+
+
+def test_changed_cycle_puts_without_second_read(servers, make_records_on):
+    arvan, echo = servers
+    records = make_records_on(3, OLD_IP)
+    report = run_cycle(records, _log)
+    assert report['updated'] == 3
+    # One shared IP lookup, then one GET and one PUT per record
+    assert echo.counts == {'ip': 1}
+    assert arvan.counts == {'get': 3, 'put': 3}
+    assert all(record['value'][0]['ip'] == PUBLIC_IP for record in arvan.records.values())
+
+
+def test_update_dns_record_single_pass(servers, make_records_on):
+    arvan, echo = servers
+    record, = make_records_on(1, OLD_IP)
+    assert update_dns_record(record, _log)
+    assert echo.counts == {'ip': 1}
+    assert arvan.counts == {'get': 1, 'put': 1}
+    assert arvan.records[(DOMAIN, 'rec0')]['value'][0]['ip'] == PUBLIC_IP
+
+    arvan.reset_counts()
+    echo.reset_counts()
+    assert not update_dns_record(record, _log)
+    assert echo.counts == {'ip': 1}
+    assert arvan.counts == {'get': 1}
+
+
+def test_no_update_logged_only_when_all_unchanged(servers, make_records_on):
+    arvan, echo = servers
+    records = make_records_on(2, PUBLIC_IP)
+    messages = []
+    run_cycle(records, messages.append)
+    assert any(message.startswith("No update necessary") for message in messages)
+
+    echo.error_rate = 1.0  # IP lookup fails
+    messages = []
+    run_cycle(records, messages.append)
+    assert not any(message.startswith("No update necessary") for message in messages)
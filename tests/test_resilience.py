@@ -0,0 +1,116 @@
+import time
+
+import pytest
+import requests
+
+from arvan_ddns import CircuitOpenError, configure_resilience
+from arvan_ddns.resilience import breaker_states, request
+from fake_servers import _Handler, _Server
+
+
+def _fast_retries(**overrides):
+    settings = dict(retries=2, backoff_base=0.001, backoff_max=0.01, budget=30, threshold=100, reset_timeout=60)
+    settings.update(overrides)
+    configure_resilience(**settings)
+
+
+def test_retries_5xx_then_gives_back_last_answer(servers):
+    _, echo = servers
+    _fast_retries()
+    echo.error_rate = 1.0
+    response = request('GET', echo.url)
+    assert response.status_code == 503
+    assert echo.counts == {'ip': 3, 'error': 3}
+
+
+def test_connection_errors_are_retried(servers):
+    _fast_retries()
+    started = time.monotonic()
+    with pytest.raises(requests.ConnectionError):
+        request('GET', 'http://127.0.0.1:9/')  # Nothing listens on the discard port
+    assert time.monotonic() - started < 5
+
+
+class _TooManyRequests(_Handler):
+    # 429 with Retry-After on the first call, 200 afterwards
+    def do_GET(self):
+        self.server.count('get')
+        if self.server.counts['get'] == 1:
+            self.send_response(429)
+            self.send_header('Retry-After', '0.3')
+            self.send_header('Content-Length', '0')
+            self.end_headers()
+            return
+        self._send(200, b'ok', 'text/plain')
+
+
+def test_429_waits_for_retry_after(servers):
+    _fast_retries()
+    server = _Server(_TooManyRequests).start()
+    try:
+        started = time.monotonic()
+        response = request('GET', server.url)
+        assert response.status_code == 200
+        assert time.monotonic() - started >= 0.3
+        assert server.counts == {'get': 2}
+    finally:
+        server.stop()
+
+
+def test_breaker_opens_and_recovers(servers):
+    _, echo = servers
+    _fast_retries(retries=0, threshold=2, reset_timeout=0.3)
+    echo.error_rate = 1.0
+    for _ in range(2):
+        assert request('GET', echo.url).status_code == 503
+    with pytest.raises(CircuitOpenError):
+        request('GET', echo.url)
+    assert echo.counts == {'ip': 2, 'error': 2}  # The open circuit sent nothing
+
+    time.sleep(0.35)
+    echo.error_rate = 0.0
+    assert request('GET', echo.url).status_code == 200  # The half-open probe
+    assert set(breaker_states().values()) == {'closed'}
+
+
+def test_half_open_probe_ends_on_any_request_error(servers, monkeypatch):
+    _, echo = servers
+    _fast_retries(retries=0, threshold=1, reset_timeout=0)
+    echo.error_rate = 1.0
+    request('GET', echo.url)
+    echo.error_rate = 0.0
+    session = requests.Session()
+
+    def broken(*args, **kwargs):
+        raise requests.exceptions.ChunkedEncodingError("broken body")
+
+    monkeypatch.setattr(session, 'request', broken)
+    monkeypatch.setattr('arvan_ddns.resilience.get_session', lambda: session)
+    with pytest.raises(requests.exceptions.ChunkedEncodingError):
+        request('GET', echo.url)
+    monkeypatch.undo()
+    assert request('GET', echo.url).status_code == 200
+
+
+def test_budget_caps_a_hanging_attempt(servers):
+    _, echo = servers
+    _fast_retries(budget=0.5)
+    echo.latency = 2.0
+    started = time.monotonic()
+    with pytest.raises(requests.Timeout):
+        request('GET', echo.url, timeout=(1.0, 1.0))
+    assert time.monotonic() - started < 0.9
+
+
+def test_budget_stops_retrying(servers):
+    _, echo = servers
+    _fast_retries(retries=50, budget=1.0)
+    echo.latency = 0.2
+    echo.error_rate = 1.0
+    started = time.monotonic()
+    try:
+        assert request('GET', echo.url).status_code == 503
+    except requests.Timeout:
+        pass  # The last attempt started with less budget left than the latency
+    assert time.monotonic() - started < 1.5
+    assert echo.counts['ip'] < 10
@@ -0,0 +1,50 @@
+import struct
+
+import pytest
+
+from arvan_ddns import ConfigError, Resolver, load_model
+from arvan_ddns import resolver
+
+
+class _Backend:
+    def __init__(self, name, answer):
+        self.name = name
+        self.answer = answer
+
+    def supports(self, family):
+        return True
+
+    def resolve(self, family):
+        if isinstance(self.answer, Exception):
+            raise self.answer
+        return self.answer
+
+
+@pytest.fixture(autouse=True)
+def routed(monkeypatch):
+    monkeypatch.setattr(resolver, 'has_route', lambda family: True)
+
+
+def test_quorum_counts_votes_across_races():
+    # Four agreeing backends, but only three race first
+    backends = [_Backend(f"b{index}", '203.0.113.7') for index in range(5)]
+    assert Resolver(backends, quorum=4, race=3).resolve('a') == '203.0.113.7'
+
+
+def test_fallback_completes_a_missed_quorum():
+    backends = [_Backend('good', '203.0.113.7'), _Backend('down1', OSError('down')),
+                _Backend('down2', OSError('down')), _Backend('fallback', '203.0.113.7')]
+    assert Resolver(backends, quorum=2, race=3).resolve('a') == '203.0.113.7'
+
+
+def test_garbled_backend_answer_is_a_failure():
+    backends = [_Backend('garbled', struct.error('unpack requires a buffer'))]
+    assert Resolver(backends).resolve('a') is None
+
+
+def test_quorum_above_backends_is_a_config_error(tmp_path):
+    path = tmp_path / 'config.ini'
+    path.write_text("[DEFAULT]\nApiKey = k\nDomain = example.com\nRecordID = r1\nRecordType = A\n"
+                    "Resolvers = ipify, opendns\nResolverQuorum = 3\n")
+    with pytest.raises(ConfigError, match='ResolverQuorum'):
+        load_model(str(path))
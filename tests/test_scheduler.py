@@ -0,0 +1,30 @@
+import threading
+
+from arvan_ddns.scheduler import Scheduler
+
+
+def test_interrupt_alone_makes_nothing_due():
+    scheduler = Scheduler()
+    scheduler.add('home', 100)
+    scheduler.interrupt()
+    assert scheduler.wait(threading.Event()) == ([], False)
+
+
+def test_trigger_survives_a_simultaneous_interrupt():
+    scheduler = Scheduler()
+    scheduler.add('home', 100)
+    scheduler.add('office', 100)
+    scheduler.interrupt()  # A config reload ...
+    scheduler.trigger()  # ... and an address change before wait() wakes up
+    due, triggered = scheduler.wait(threading.Event())
+    assert sorted(due) == ['home', 'office']
+    assert triggered
+
+
+def test_stop_wins():
+    scheduler = Scheduler()
+    scheduler.add('home', 100)
+    stop_event = threading.Event()
+    stop_event.set()
+    scheduler.trigger()
+    assert scheduler.wait(stop_event) == ([], False)
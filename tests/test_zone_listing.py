@@ -0,0 +1,36 @@
+from arvan_ddns import api, run_cycle
+
+from conftest import OLD_IP, PUBLIC_IP
+
+
+def _log(message):
+    pass
+
+
+def test_zone_mode_lists_100_records_in_pages(servers, make_records_on, monkeypatch):
+    arvan, _ = servers
+    monkeypatch.setattr(api, 'RECORDS_PER_PAGE', 30)
+    records = make_records_on(100, PUBLIC_IP, check_mode='zone')
+    report = run_cycle(records, _log)
+    assert report['checked'] == 100
+    assert report['updated'] == 0
+    # ceil(100 / 30) listing pages and not a single per-record GET
+    assert arvan.counts == {'list': 4}
+
+
+def test_zone_mode_single_page(servers, make_records_on):
+    arvan, _ = servers
+    records = make_records_on(100, OLD_IP, check_mode='zone')
+    report = run_cycle(records, _log)
+    assert report['updated'] == 100
+    assert arvan.counts == {'list': 1, 'put': 100}
+
+
+def test_zone_mode_falls_back_to_record_gets(servers, make_records_on, monkeypatch):
+    arvan, _ = servers
+    records = make_records_on(100, OLD_IP, check_mode='zone')
+    # The stand-in answers 404 on anything but /dns-records
+    monkeypatch.setattr(api, 'zone_url', lambda domain: f"{api.API_BASE}/domains/{domain}/missing")
+    report = run_cycle(records, _log)
+    assert report['updated'] == 100
+    assert arvan.counts == {'get': 100, 'put': 100}